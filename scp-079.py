@@ -7,55 +7,18 @@
 
 import tkinter as tk
 from tkinter import font, messagebox
-import ollama
 import threading
+import queue
 import time
-import re
-import json
 import os
+import argparse
 import logging
-from pathlib import Path
-from datetime import datetime
+from collections import deque, OrderedDict
 
-# Set Ollama home directory
-os.environ['OLLAMA_MODELS'] = r'C:\Users\%USERNAME%\.ollama\models'
+from scp079_engine import (Frontend, SCP079Session, SCP_079_ART, CLEAR_SCREEN, commands, static_screens,
+                           log_file, model_catalog, startup_profile, warm_up)
 
-# Get the directory of the current script
-script_dir = Path(__file__).parent
-prompt_file = script_dir / 'system_prompt.json'
-log_file = script_dir / 'scp-079.log'
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] %(levelname)s: %(message)s',
-    handlers=[
-        logging.FileHandler(log_file, encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
-logger.info("=" * 60)
-logger.info("SCP-079 Containment Interface - STARTED")
-logger.info("=" * 60)
-
-# Load system prompt from JSON file
-try:
-    with open(prompt_file, 'r') as f:
-        SYSTEM_PROMPT = json.load(f)['prompt']
-    logger.info(f"System prompt loaded from {prompt_file}")
-except Exception as e:
-    logger.error(f"Failed to load system prompt: {e}")
-    SYSTEM_PROMPT = "You are SCP-079."
-
-# Model to use
-MODEL = 'phi3.5:3.8b-mini-instruct-q4_K_M'
-FALLBACK_MODELS = [
-# Add more by running `ollama list` the in terminal, then copying the model names here.
-    'mannix/llama3.1-8b-abliterated:q4_k_m'
-]
-# Actual detected model name (will include version tag like :q4_k_m)
-ACTUAL_MODEL = None
 
 # Color scheme - Black and White with grays
 COLOR_BLACK = '#000000'
@@ -71,9 +34,6 @@ font_brightness = 255  # 0-255
 scanline_amount = 2    # pixels between scanlines (1-5)
 glow_amount = 1        # glow intensity (1-5)
 
-# Conversation history (simulates limited memory: last 5 exchanges)
-conversation_history = []
-
 # Command history for navigation
 command_history = []
 history_index = -1
@@ -81,32 +41,458 @@ history_index = -1
 # Scanline mode (horizontal or vertical)
 scanline_mode = 'horizontal'  # 'horizontal' or 'vertical'
 
-# SCP-079 ASCII Art (retro computer representation)
-SCP_079_ART = """
-  EXIDY SORCERER - SCP-079
-  CONTAINMENT INTERFACE v2.1
-  
-##############################
-#     [SCP-079 TERMINAL]     #
-##############################
-  
-  RF CABLE: CONNECTED
-  MEMORY: OPERATIONAL
-"""
+# Display canvas geometry (the canvas starts at this size and then follows the window)
+CANVAS_WIDTH = 920
+CANVAS_HEIGHT = 380
+TEXT_MARGIN = 20        # canvas width not used by text (wrap width = width - margin)
+FRAME_MS = 16  # redraw batching interval (~60 FPS)
+RESIZE_SETTLE_MS = 250  # after a resize, wait this long before redoing the expensive extras
+
+# Scanline overlay images kept (one per mode, density and canvas size)
+SCANLINE_CACHE_SIZE = 4
+
+# Scrollback limits (whichever is hit first drops the oldest lines)
+SCROLLBACK_MAX_LINES = 2000
+SCROLLBACK_MAX_CHARS = 200000
 
-HELP_TEXT = """
-AVAILABLE COMMANDS:
-[ H E L P ] - Display this message
-[ C L E A R ] - Clear screen
-[ H I S T O R Y ] - Show conversation
-[ S T A T U S ] - System status
-[ E X I T ] - Terminate connection
-[ C O N F I G ] - Configuration
-It might take some time to respond, especially for complex queries and on slower computers.
-"""
 
-class SCP079Interface:
+class CRTTextRenderer:
+    """Line-based text layout for the CRT canvas with a bounded scrollback.
+    
+    Text is kept as a capped deque of lines. Only the lines inside the visible
+    window get canvas text items (plus their glow copies), so appending text lays
+    out just the line being typed and any new lines, and memory and frame time
+    stay flat however long the session runs. The window is positioned by moving
+    the canvas view, which keeps centering and auto-scroll cheap.
+    
+    The static screens (HELP, CLEAR, ...) given to pin_screens are kept laid out
+    (hidden) while not shown, so set_text just swaps their items back in. They
+    depend on the font, glow and canvas size, so changing any of them drops the
+    layouts; any other text passed to set_text is laid out afresh every time.
+    
+    The layout follows the canvas size given to resize(): wrap width, centering
+    and how many lines are kept on screen all derive from it.
+    """
+    
+    def __init__(self, canvas, text_font, width=CANVAS_WIDTH, height=CANVAS_HEIGHT,
+                 max_lines=SCROLLBACK_MAX_LINES, max_chars=SCROLLBACK_MAX_CHARS):
+        self.canvas = canvas
+        self.font = text_font
+        self.width = width
+        self.height = height
+        self.metrics = None       # metrics of the current font size
+        self.metrics_cache = {}   # font size -> {"linespace", "char_width"}
+        self.max_lines = max_lines
+        self.max_chars = max_chars
+        self.scrollback = deque([""])  # every stored line, oldest first
+        self.stored_chars = 0
+        self.scroll_pos = 0  # lines scrolled back from the newest (0 = follow output)
+        self.visible = deque()  # line records on screen: {"text", "y", "height", "width", "items"}
+        self.fill = COLOR_WHITE
+        self.shadow_fill = COLOR_DARK_GRAY
+        self.glow_offsets = [(1, 1), (-1, -1)]
+        self.view = (0, 0)
+        self.view_size = (0, 0)
+        self.overlay = []
+        self.overlay_colors = None
+        self.pinned = set()  # texts of the screens worth keeping laid out
+        self.screens = {}    # pinned text -> {"lines", "visible", "tag"}, hidden when not shown
+        self.screen = None  # text of the cached screen on display, if any
+        self.screen_ids = 0
+    
+    @property
+    def wrap_width(self):
+        """Width the text is wrapped at."""
+        return max(1, self.width - TEXT_MARGIN)
+    
+    def font_metrics(self):
+        """Line height and character width of the font, measured once per font size."""
+        if self.metrics is None:
+            size = self.font.cget('size')
+            self.metrics = self.metrics_cache.get(size)
+            if self.metrics is None:
+                self.metrics = {"linespace": self.font.metrics('linespace'), "char_width": self.font.measure('X')}
+                self.metrics_cache[size] = self.metrics
+        return self.metrics
+    
+    def resize(self, width, height):
+        """Lay the text out again for a new canvas size; return False if it didn't change."""
+        if (width, height) == (self.width, self.height):
+            return False
+        self.width = width
+        self.height = height
+        self.invalidate_screens()
+        self.render_window()
+        return True
+    
+    def get_text(self):
+        """Return the full text held in the scrollback."""
+        return '\n'.join(self.scrollback)
+    
+    def set_text(self, text):
+        """Replace everything on screen (and the scrollback) with text."""
+        self.clear_overlay()
+        if text not in self.pinned:
+            # One-off text (STATUS, HISTORY, ...) rarely repeats - don't keep its layout
+            self.scrollback = deque(text.split('\n'))
+            self.stored_chars = len(text)
+            self.scroll_pos = 0
+            self.trim_scrollback()
+            self.render_window()
+            return
+        self.clear_lines()
+        screen = self.prepare_screen(text)
+        self.canvas.itemconfig(screen["tag"], state='normal')
+        self.canvas.addtag_withtag('crt_text', screen["tag"])
+        self.screen = text
+        self.visible = screen["visible"]
+        self.scrollback = deque(screen["lines"])
+        self.stored_chars = len(text)
+        self.scroll_pos = 0
+        self.trim_scrollback()
+        self.place_view()
+    
+    def pin_screens(self, texts):
+        """Keep these screens laid out from now on (and stop keeping any others)."""
+        self.pinned = set(texts)
+        for text in [text for text in self.screens if text not in self.pinned and text != self.screen]:
+            self.canvas.delete(self.screens.pop(text)["tag"])
+    
+    def prepare_screen(self, text):
+        """Return the cached layout of a pinned screen, laying it out (hidden) if needed."""
+        screen = self.screens.get(text)
+        if screen is not None:
+            return screen
+        self.screen_ids += 1
+        tag = f'crt_screen{self.screen_ids}'
+        lines = text.split('\n')
+        # Created visible so they can be measured; hidden again before Tk next redraws
+        visible = self.stack_lines(lines, len(lines) - 1, tags=('crt_cached', tag), state='normal')
+        self.canvas.itemconfig(tag, state='hidden')
+        screen = {"lines": lines, "visible": visible, "tag": tag}
+        self.screens[text] = screen
+        return screen
+    
+    def clear_lines(self):
+        """Take the lines off the canvas: a cached screen is hidden, live lines deleted."""
+        if self.screen is None:
+            self.canvas.delete('crt_text')
+        else:
+            tag = self.screens[self.screen]["tag"]
+            self.canvas.itemconfig(tag, state='hidden')
+            self.canvas.dtag(tag, 'crt_text')
+            self.screen = None
+        self.visible = deque()
+    
+    def adopt_screen(self):
+        """Turn the cached screen on display into live lines (before they are edited)."""
+        if self.screen is not None:
+            tag = self.screens.pop(self.screen)["tag"]
+            self.canvas.dtag(tag, 'crt_cached')
+            self.screen = None
+    
+    def invalidate_screens(self):
+        """Drop every cached screen (after the font or glow changed)."""
+        self.clear_lines()
+        self.canvas.delete('crt_cached')
+        self.screens.clear()
+    
+    def append(self, text):
+        """Append text, laying out only the last line and any new ones."""
+        if not text:
+            return
+        self.clear_overlay()
+        self.adopt_screen()
+        parts = text.split('\n')
+        last_text = self.scrollback[-1] + parts[0]
+        self.scrollback[-1] = last_text
+        self.scrollback.extend(parts[1:])
+        self.stored_chars += len(text)
+        self.trim_scrollback()
+        
+        if self.scroll_pos:
+            # Operator is paging back - keep the same lines on screen
+            self.scroll_pos = min(self.scroll_pos + len(parts) - 1, len(self.scrollback) - 1)
+            return
+        if len(parts) > self.height // self.font_metrics()["linespace"]:
+            # More than a screenful arrived at once - only the tail will be visible
+            self.render_window()
+            return
+        
+        last = self.visible[-1]
+        if parts[0]:
+            last["text"] = last_text
+            for item in last["items"]:
+                self.canvas.itemconfig(item, text=last_text)
+            self.measure_line(last)
+        for part in parts[1:]:
+            line = self.create_line(part)
+            self.move_line(line, self.visible[-1]["y"] + self.visible[-1]["height"])
+            self.visible.append(line)
+        self.trim_window()
+        self.place_view()
+    
+    def trim_scrollback(self):
+        """Forget the oldest lines beyond the line and character caps."""
+        while len(self.scrollback) > 1 and (len(self.scrollback) > self.max_lines
+                                            or self.stored_chars > self.max_chars):
+            self.stored_chars -= len(self.scrollback.popleft()) + 1
+    
+    def scroll(self, lines):
+        """Scroll back (positive) or forward (negative) through the scrollback."""
+        scroll_pos = max(0, min(self.scroll_pos + lines, len(self.scrollback) - 1))
+        if scroll_pos != self.scroll_pos:
+            self.clear_overlay()
+            self.scroll_pos = scroll_pos
+            self.render_window()
+    
+    def page_lines(self):
+        """Number of lines currently on screen (one page of scrolling)."""
+        return max(1, len(self.visible) - 1)
+    
+    def render_window(self):
+        """Rebuild the canvas items for the lines inside the visible window."""
+        self.clear_lines()
+        self.visible = self.stack_lines(self.scrollback, len(self.scrollback) - 1 - self.scroll_pos)
+        self.place_view()
+    
+    def stack_lines(self, lines, bottom, **options):
+        """Create lines upwards from lines[bottom] until the screen is full."""
+        visible = deque()
+        y = 0
+        for index in range(bottom, -1, -1):
+            line = self.create_line(lines[index], **options)
+            y -= line["height"]
+            self.move_line(line, y)
+            visible.appendleft(line)
+            if -y >= self.height:
+                break
+        return visible
+    
+    def trim_window(self):
+        """Drop lines that have scrolled off the top of the screen."""
+        height = self.visible[-1]["y"] + self.visible[-1]["height"] - self.visible[0]["y"]
+        while len(self.visible) > 1 and height - self.visible[0]["height"] >= self.height:
+            line = self.visible.popleft()
+            height -= line["height"]
+            self.canvas.delete(*line["items"])
+    
+    def create_line(self, text, tags=('crt_text',), state=None):
+        """Create the canvas items for one line and measure it."""
+        state = state or ('hidden' if self.overlay else 'normal')
+        line = {"text": text, "y": 0, "height": 0, "width": 0, "items": []}
+        for dx, dy in self.glow_offsets:
+            line["items"].append(self.canvas.create_text(
+                dx, dy, anchor='nw', font=self.font, fill=self.shadow_fill, state=state,
+                text=text, width=self.wrap_width, tags=tags + ('crt_shadow',)
+            ))
+        # Main text item is always last so it sits above its glow
+        line["items"].append(self.canvas.create_text(
+            0, 0, anchor='nw', font=self.font, fill=self.fill, state=state,
+            text=text, width=self.wrap_width, tags=tags + ('crt_main',)
+        ))
+        self.measure_line(line)
+        return line
+    
+    def move_line(self, line, y):
+        """Place a line's items with its top edge at y."""
+        for item, (dx, dy) in zip(line["items"], self.glow_offsets + [(0, 0)]):
+            self.canvas.coords(item, dx, y + dy)
+        line["y"] = y
+    
+    def measure_line(self, line):
+        """Update a line's size after its text changed."""
+        bbox = self.canvas.bbox(line["items"][-1]) if line["text"] else None
+        if bbox:
+            line["width"] = bbox[2] - bbox[0]
+            line["height"] = bbox[3] - bbox[1]
+        else:
+            line["width"] = 0
+            line["height"] = self.font_metrics()["linespace"]
+    
+    def relayout(self):
+        """Re-measure and re-stack the visible lines (needed after the font size changes)."""
+        self.metrics = None
+        self.invalidate_screens()
+        self.render_window()
+    
+    def place_view(self):
+        """Center short content on screen; keep the bottom line visible otherwise."""
+        top = self.visible[0]["y"]
+        height = self.visible[-1]["y"] + self.visible[-1]["height"] - top
+        width = max(line["width"] for line in self.visible)
+        vx = (width - self.width) // 2
+        if height <= self.height:
+            vy = top + (height - self.height) // 2
+        else:
+            vy = top + height - self.height
+        if (vx, vy) == self.view and self.view_size == (self.width, self.height):
+            return
+        dx, dy = vx - self.view[0], vy - self.view[1]
+        self.view = (vx, vy)
+        self.view_size = (self.width, self.height)
+        self.canvas.configure(scrollregion=(vx, vy, vx + self.width, vy + self.height))
+        self.canvas.xview_moveto(0)
+        self.canvas.yview_moveto(0)
+        # Screen-fixed decorations follow the view
+        self.canvas.move('scanline', dx, dy)
+        for item in self.overlay:
+            self.canvas.move(item, dx, dy)
+    
+    def set_colors(self, fill, shadow_fill):
+        """Recolor the text and its glow (cached screens included)."""
+        self.fill = fill
+        self.shadow_fill = shadow_fill
+        self.canvas.itemconfig('crt_main', fill=fill)
+        self.canvas.itemconfig('crt_shadow', fill=shadow_fill)
+    
+    def set_glow(self, offsets, shadow_fill):
+        """Rebuild the glow copies of the visible lines with new offsets and color."""
+        self.glow_offsets = list(offsets)
+        self.shadow_fill = shadow_fill
+        self.invalidate_screens()
+        self.render_window()
+    
+    def show_overlay(self, text, fill, shadow_fill):
+        """Cover the screen with text (e.g. the X block) until the next append."""
+        self.clear_overlay()
+        self.canvas.itemconfig('crt_text', state='hidden')
+        self.overlay_colors = (fill, shadow_fill)
+        cx = self.view[0] + self.width // 2
+        cy = self.view[1] + self.height // 2
+        for dx, dy in self.glow_offsets:
+            self.overlay.append(self.canvas.create_text(
+                cx + dx, cy + dy, anchor='c', font=self.font, fill=shadow_fill,
+                text=text, width=self.wrap_width
+            ))
+        self.overlay.append(self.canvas.create_text(
+            cx, cy, anchor='c', font=self.font, fill=fill, text=text, width=self.wrap_width
+        ))
+    
+    def clear_overlay(self):
+        """Remove the overlay and show the normal text again."""
+        if not self.overlay:
+            return
+        self.canvas.delete(*self.overlay)
+        self.overlay = []
+        self.canvas.itemconfig('crt_text', state='normal')
+
+
+class UIUpdateQueue:
+    """Channel for display updates coming from worker threads.
+    
+    Producers on any thread put text or callables on the queue and the Tk thread
+    drains it once per frame. Runs of appended text are merged, so a burst of
+    streamed tokens becomes a single canvas update.
+    """
+    
     def __init__(self):
+        self.pending = queue.SimpleQueue()
+    
+    def put_text(self, text):
+        """Queue text to append to the display."""
+        self.pending.put((None, text))
+    
+    def put_call(self, func, *args):
+        """Queue a call to run on the Tk thread."""
+        self.pending.put((func, args))
+    
+    def drain(self, append):
+        """Apply every pending update in order; append receives each merged run of text."""
+        text = []
+        while True:
+            try:
+                func, payload = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            if func is None:
+                text.append(payload)
+                continue
+            if text:
+                append(''.join(text))
+                text = []
+            func(*payload)
+        if text:
+            append(''.join(text))
+
+
+class AnimationScheduler:
+    """Runs display effects from a single root.after loop at a fixed frame rate.
+    
+    Effects are generators: each step does a little work and yields how many
+    seconds to wait before the next step (0 = next frame). Effects queued on the
+    same channel play one after another; different channels run side by side.
+    """
+    
+    def __init__(self, root, frame_ms=FRAME_MS):
+        self.root = root
+        self.frame_ms = frame_ms
+        self.channels = {}  # channel -> deque of effects, the head one is playing
+        self.wake_at = {}   # channel -> time the playing effect wants its next step
+        self.frame_hooks = []  # callables run once per frame after the effects
+        self.frame_stats = None  # optional callable receiving each frame's work time in ms
+        self.skipping = False
+    
+    def play(self, effect, channel='display'):
+        """Queue an effect on a channel."""
+        self.channels.setdefault(channel, deque()).append(effect)
+    
+    def busy(self, channel='display'):
+        """Return True if anything is playing or queued on the channel."""
+        return bool(self.channels.get(channel))
+    
+    def cancel(self, channel='display'):
+        """Drop everything playing or queued on the channel."""
+        for effect in self.channels.pop(channel, ()):
+            effect.close()
+        self.wake_at.pop(channel, None)
+    
+    def finish(self, channel='display'):
+        """Run everything on the channel to completion right now, skipping waits."""
+        self.skipping = True
+        try:
+            queue = self.channels.pop(channel, ())
+            self.wake_at.pop(channel, None)
+            while queue:
+                for _ in queue.popleft():
+                    pass
+        finally:
+            self.skipping = False
+    
+    def start(self):
+        """Start the frame loop."""
+        self.tick()
+    
+    def tick(self):
+        """Advance every channel by one frame."""
+        now = time.monotonic()
+        started = time.perf_counter()
+        for channel, effects in list(self.channels.items()):
+            while effects and self.wake_at.get(channel, 0) <= now:
+                try:
+                    self.wake_at[channel] = now + (next(effects[0]) or 0)
+                    break
+                except StopIteration:
+                    # Effect done - the next one on this channel starts straight away
+                    effects.popleft()
+                    self.wake_at.pop(channel, None)
+            if not effects:
+                self.channels.pop(channel, None)
+        
+        for hook in self.frame_hooks:
+            hook()
+        if self.frame_stats:
+            self.frame_stats((time.perf_counter() - started) * 1000)
+        
+        if self.root.winfo_exists():
+            self.root.after(self.frame_ms, self.tick)
+
+
+class SCP079Interface(Frontend):
+    def __init__(self, profile_startup=False):
+        window_started = time.perf_counter()
+        self.profile_startup = profile_startup
+        self.startup_step = None  # background startup step shown in the status bar
         self.root = tk.Tk()
         self.root.title("SCP-079 Containment Interface")
         self.root.geometry("950x850")
@@ -179,39 +565,39 @@ class SCP079Interface:
         self.status_label.pack(anchor='w', padx=5, pady=4)
         
         # Initialize state variables BEFORE creating display (needed for add_scanlines)
-        self.locked = False
-        self.response_in_progress = False
-        self.memory_level = 100
+        self.session = SCP079Session(self)  # conversation state; checks models in the background
         self.show_time = False
         self.start_time = time.time()
         self.font_size = 10
-        self.scroll_pos = 0
         self.font_brightness = 255
         self.scanline_amount = 2
         self.glow_amount = 1
-        self.display_buffer = SCP_079_ART + "\n\nINITIALIZING CONTAINMENT INTERFACE...\n\nAWAITING INPUT..."  # Track content separately
+        self.show_perf = False   # perf overlay in the status bar
+        self.rendered_chars = 0  # characters laid out since the last timer tick
+        self.ui_queue = UIUpdateQueue()  # updates waiting for the next frame
+        self.animator = AnimationScheduler(self.root)
+        self.animator.frame_hooks.append(self.apply_resize)  # before new text is laid out
+        self.animator.frame_hooks.append(self.flush_display)
+        self.animator.frame_stats = lambda ms: self.session.perf.record('frame', ms)
         
         # Main display canvas
-        self.display_canvas = tk.Canvas(main_frame, bg=COLOR_BLACK, width=920, height=380, 
+        self.display_canvas = tk.Canvas(main_frame, bg=COLOR_BLACK, width=CANVAS_WIDTH, height=CANVAS_HEIGHT, 
                                        highlightthickness=1, highlightbackground=COLOR_LIGHT_GRAY)
-        self.display_canvas.pack(pady=(0, 5))
+        self.display_canvas.pack(fill=tk.BOTH, expand=True, pady=(0, 5))
+        # Resizes are applied once per frame, however many <Configure> events arrive
+        self.pending_size = None
+        self.settle_job = None
+        self.display_canvas.bind("<Configure>", self.canvas_configured)
+        
+        # Text display (centered, white text with subtle gray glow)
+        self.renderer = CRTTextRenderer(self.display_canvas, self.retro_font)
+        self.update_glow_effect()
         
         # Add scanlines
-        self.scanline_objects = []
+        self.scanline_images = OrderedDict()  # (mode, spacing, width, height) -> PhotoImage
+        self.scanline_item = None
         self.add_scanlines()
         
-        # Text display widgets (centered, white text)
-        self.display_text = self.display_canvas.create_text(460, 190, anchor='c', font=self.retro_font, 
-                                                             fill=COLOR_WHITE, text="", width=900)
-        
-        # Shadow effect for text (subtle gray)
-        self.shadow_texts = [
-            self.display_canvas.create_text(461, 191, anchor='c', font=self.retro_font, 
-                                          fill=COLOR_MED_GRAY, text="", width=900),
-            self.display_canvas.create_text(459, 189, anchor='c', font=self.retro_font, 
-                                          fill=COLOR_MED_GRAY, text="", width=900),
-        ]
-        
         # Command buttons frame with better styling
         buttons_frame = tk.Frame(main_frame, bg=COLOR_BLACK)
         buttons_frame.pack(pady=5)
@@ -251,7 +637,12 @@ class SCP079Interface:
         self.input_entry.bind("<Up>", self.history_up)
         self.input_entry.bind("<Down>", self.history_down)
         self.input_entry.bind("<Tab>", self.auto_complete)
-        self.input_entry.bind("<Escape>", lambda e: self.input_entry.delete(0, tk.END))
+        self.input_entry.bind("<Escape>", self.escape_pressed)
+        self.input_entry.bind("<Prior>", self.scroll_page_up)
+        self.input_entry.bind("<Next>", self.scroll_page_down)
+        self.display_canvas.bind("<MouseWheel>", self.scroll_wheel)
+        self.display_canvas.bind("<Button-4>", lambda e: self.scroll_display(3))
+        self.display_canvas.bind("<Button-5>", lambda e: self.scroll_display(-3))
         self.input_entry.focus()
         
         # Info bar at bottom
@@ -259,52 +650,36 @@ class SCP079Interface:
         info_frame.pack(fill=tk.X, pady=(5, 0))
         info_frame.pack_propagate(False)
         
-        self.info_label = tk.Label(info_frame, text="Ready | Use UP/DOWN for history | TAB for auto-complete | ESC to clear", 
+        self.info_label = tk.Label(info_frame, text="Ready | Use UP/DOWN for history | PGUP/PGDN to scroll | TAB for auto-complete | ESC to clear", 
                                   font=self.small_font, bg=COLOR_DARK_GRAY, fg=COLOR_LIGHT_GRAY)
         self.info_label.pack(anchor='w', padx=5, pady=3)
         
-        # Check available models on startup
-        self.check_models_on_startup()
-        
         # Initial display
         initial_text = SCP_079_ART + "\n\nINITIALIZING CONTAINMENT INTERFACE...\n\nAWAITING INPUT..."
         self.type_text(initial_text)
         
         # Start status and time updates
         self.update_timer()
+        self.animator.start()
         self.blink_cursor()
+        
+        # Everything slow happens once the window and banner are on screen
+        startup_profile.record("window setup", window_started)
+        self.root.after_idle(self.start_background_init)
     
-    def check_models_on_startup(self):
-        """Check available models on startup."""
-        global ACTUAL_MODEL
-        logger.info("Checking available Ollama models...")
-        try:
-            response = ollama.list()
-            available_models = [model.model for model in response.models]
-            
-            if not available_models:
-                logger.warning("No models found in Ollama!")
-                return
-            
-            logger.info(f"Available models: {available_models}")
-            
-            # Check if primary model is available (check base name without version tag)
-            for available in available_models:
-                if MODEL in available:
-                    ACTUAL_MODEL = available  # Store the full model name with version tag
-                    logger.info(f"Primary model '{MODEL}' found as '{available}'")
-                    return
-            
-            # If primary not found, try to use a compatible model
-            logger.warning(f"Primary model '{MODEL}' NOT found!")
-            logger.info(f"Available models: {available_models}")
-            for available in available_models:
-                if 'llama' in available.lower():
-                    logger.info(f"Will use alternative model: {available}")
-                    break
-        except Exception as e:
-            logger.error(f"Failed to check models on startup: {e}")
-            logger.warning("Is Ollama running? Make sure Ollama app is open.")
+    def start_background_init(self):
+        """Load the model client and friends in the background, once the window is drawn."""
+        startup_profile.mark("window shown")
+        threading.Thread(target=warm_up, args=(self.startup_progress,), daemon=True).start()
+    
+    def startup_progress(self, step, number, count):
+        """Show background startup progress in the status bar (any thread)."""
+        self.startup_step = f"{step} ({number}/{count})" if step else None
+        self.run_on_ui(self.update_status)
+        if step is None:
+            startup_profile.mark("ready")
+            if self.profile_startup:
+                print(startup_profile.report())
     
     def maximize_window(self):
         """Maximize the window."""
@@ -318,8 +693,21 @@ class SCP079Interface:
             self.root.state('normal')
     
     def update_status(self):
-        """Update status bar (called from update_timer now)."""
-        pass
+        """Update status bar (called from update_timer, and as startup progresses)."""
+        uptime_seconds = int(time.time() - self.start_time)
+        uptime = f"{uptime_seconds // 3600:02d}:{(uptime_seconds % 3600) // 60:02d}:{uptime_seconds % 60:02d}"
+        locked_status = "LOCKED" if self.session.locked else "ONLINE"
+        if self.startup_step:
+            response_status = "INITIALIZING"
+            model_status = self.startup_step
+        else:
+            response_status = "PROCESSING" if self.session.response_in_progress else "READY"
+            if model_catalog.error:
+                model_catalog.refresh()  # re-probes in the background once the error expires
+            model_status = model_catalog.status()
+        status_text = (f"STATUS: {response_status} | MODEL: {model_status} | MEMORY: {self.session.memory_level}% | "
+                       f"{self.perf_hud()}STATE: {locked_status} | UPTIME: {uptime}")
+        self.status_label.config(text=status_text)
     
     def blink_cursor(self):
         """Cursor blink handled by update_timer."""
@@ -328,19 +716,61 @@ class SCP079Interface:
     def add_scanlines(self):
         """Add CRT scanlines effect (horizontal or vertical) with adjustable density."""
         global scanline_mode
-        # Clear existing scanlines
-        for obj in self.scanline_objects:
-            self.display_canvas.delete(obj)
-        self.scanline_objects = []
-        
-        if scanline_mode == 'horizontal':
-            for y in range(0, 380, self.scanline_amount):
-                obj = self.display_canvas.create_line(0, y, 920, y, fill=COLOR_SCANLINE, width=1)
-                self.scanline_objects.append(obj)
-        else:  # vertical
-            for x in range(0, 920, self.scanline_amount):
-                obj = self.display_canvas.create_line(x, 0, x, 380, fill=COLOR_SCANLINE, width=1)
-                self.scanline_objects.append(obj)
+        image = self.scanline_image(scanline_mode, self.scanline_amount, self.renderer.width, self.renderer.height)
+        if self.scanline_item is not None:
+            # Swapping the pattern is a single item update
+            self.display_canvas.itemconfig(self.scanline_item, image=image)
+            return
+        
+        # Scanlines are fixed to the screen, so place them at the current view origin
+        vx, vy = self.renderer.view
+        self.scanline_item = self.display_canvas.create_image(vx, vy, anchor='nw', image=image, tags='scanline')
+        self.display_canvas.tag_lower('scanline')
+    
+    def scanline_image(self, mode, spacing, width, height):
+        """Return the cached scanline overlay image for a mode, density and size."""
+        key = (mode, spacing, width, height)
+        if key in self.scanline_images:
+            self.scanline_images.move_to_end(key)
+        else:
+            # Pixels not painted stay transparent, so the text shows through
+            image = tk.PhotoImage(width=width, height=height)
+            if mode == 'horizontal':
+                for y in range(0, height, spacing):
+                    image.put(COLOR_SCANLINE, to=(0, y, width, y + 1))
+            else:  # vertical
+                for x in range(0, width, spacing):
+                    image.put(COLOR_SCANLINE, to=(x, 0, x + 1, height))
+            self.scanline_images[key] = image
+            while len(self.scanline_images) > SCANLINE_CACHE_SIZE:
+                self.scanline_images.popitem(last=False)
+        return self.scanline_images[key]
+    
+    def canvas_configured(self, event):
+        """Note the canvas' new size; the relayout happens on the next frame."""
+        inset = int(self.display_canvas['highlightthickness']) + int(self.display_canvas['borderwidth'])
+        self.pending_size = (max(1, event.width - 2 * inset), max(1, event.height - 2 * inset))
+    
+    def apply_resize(self):
+        """Lay the display out for the latest canvas size (frame hook, so once per frame)."""
+        if self.pending_size is None:
+            return
+        width, height = self.pending_size
+        self.pending_size = None
+        if not self.renderer.resize(width, height):
+            return
+        if self.renderer.overlay:
+            self.renderer.show_overlay(self.x_block_text(), *self.renderer.overlay_colors)
+        # Scanlines and the cached screens are redone once the size stops changing
+        if self.settle_job is not None:
+            self.root.after_cancel(self.settle_job)
+        self.settle_job = self.root.after(RESIZE_SETTLE_MS, self.resize_settled)
+    
+    def resize_settled(self):
+        """Rebuild the size-dependent extras after a resize."""
+        self.settle_job = None
+        self.add_scanlines()
+        self.prepare_screens()
     
     def toggle_scanlines(self):
         """Toggle between horizontal and vertical scanlines."""
@@ -354,12 +784,16 @@ class SCP079Interface:
         """Increase font size."""
         self.font_size = min(14, self.font_size + 1)
         self.retro_font.configure(size=self.font_size)
+        self.renderer.relayout()
+        self.prepare_screens()
         self.info_label.config(text=f"Font size: {self.font_size}")
     
     def decrease_font(self):
         """Decrease font size."""
         self.font_size = max(8, self.font_size - 1)
         self.retro_font.configure(size=self.font_size)
+        self.renderer.relayout()
+        self.prepare_screens()
         self.info_label.config(text=f"Font size: {self.font_size}")
     
     def toggle_time(self):
@@ -464,58 +898,70 @@ class SCP079Interface:
         # Calculate color based on brightness value (50-255 -> grayscale)
         brightness_hex = format(int(self.font_brightness), '02x')
         text_color = f'#{brightness_hex}{brightness_hex}{brightness_hex}'
-        self.display_canvas.itemconfig(self.display_text, fill=text_color)
         
-        # Update shadow with darker version
-        shadow_brightness = max(50, self.font_brightness - 100)
-        shadow_hex = format(shadow_brightness, '02x')
-        shadow_color = f'#{shadow_hex}{shadow_hex}{shadow_hex}'
-        for shadow in self.shadow_texts:
-            self.display_canvas.itemconfig(shadow, fill=shadow_color)
+        # Glow follows the text brightness
+        _, shadow_color = self.glow_style()
+        self.renderer.set_colors(text_color, shadow_color)
     
     def update_glow_effect(self):
         """Update glow effect by adjusting shadow positions and visibility."""
-        self.display_canvas.delete(*self.shadow_texts)
-        self.shadow_texts = []
-        
-        # Create shadow texts based on glow amount
-        for i in range(self.glow_amount):
-            offset = i + 1
-            shadow = self.display_canvas.create_text(
-                460 + offset, 190 + offset, anchor='c', font=self.retro_font,
-                fill=COLOR_DARK_GRAY, text=self.display_canvas.itemcget(self.display_text, 'text'),
-                width=900
-            )
-            self.shadow_texts.append(shadow)
-            # Add diagonal shadows
-            shadow2 = self.display_canvas.create_text(
-                460 - offset, 190 - offset, anchor='c', font=self.retro_font,
-                fill=COLOR_DARK_GRAY, text=self.display_canvas.itemcget(self.display_text, 'text'),
-                width=900
-            )
-            self.shadow_texts.append(shadow2)
-        
-        # Move main text to front
-        self.display_canvas.tag_raise(self.display_text)
+        offsets, shadow_color = self.glow_style()
+        self.renderer.set_glow(offsets, shadow_color)
+        self.prepare_screens()
+    
+    def prepare_screens(self):
+        """Lay out the static screens in the background, one per idle moment."""
+        pending = static_screens()
+        self.renderer.pin_screens(pending)
+        
+        def prepare_next():
+            if pending:
+                self.renderer.prepare_screen(pending.pop())
+                self.root.after_idle(prepare_next)
+        
+        self.root.after_idle(prepare_next)
+    
+    def glow_style(self):
+        """Return the glow copy offsets and color for the current settings.
+        
+        Intensity sets the spread and brightness of a single diagonal pair of
+        copies, so the glow slider never changes how many items a line costs.
+        """
+        if not self.glow_amount:
+            return [], COLOR_DARK_GRAY
+        spread = 1 if self.glow_amount <= 3 else 2
+        shadow_brightness = int(self.font_brightness * (0.1 + 0.06 * (self.glow_amount - 1)))
+        shadow_hex = format(shadow_brightness, '02x')
+        return [(spread, spread), (-spread, -spread)], f'#{shadow_hex}{shadow_hex}{shadow_hex}'
     
     def update_timer(self):
         """Update time display and uptime status."""
         current_time = time.strftime("%H:%M:%S")
-        uptime_seconds = int(time.time() - self.start_time)
-        uptime = f"{uptime_seconds // 3600:02d}:{(uptime_seconds % 3600) // 60:02d}:{uptime_seconds % 60:02d}"
         
         if self.show_time:
             self.time_label.config(text=current_time)
         
-        locked_status = "LOCKED" if self.locked else "ONLINE"
-        response_status = "PROCESSING" if self.response_in_progress else "READY"
-        self.status_label.config(
-            text=f"STATUS: {response_status} | MEMORY: {self.memory_level}% | STATE: {locked_status} | UPTIME: {uptime}"
-        )
+        # Characters rendered during the last second (only while text is flowing)
+        if self.rendered_chars:
+            self.session.perf.record('render_chars_per_s', self.rendered_chars)
+            self.rendered_chars = 0
+        
+        self.update_status()
         
         if self.root.winfo_exists():
             self.root.after(1000, self.update_timer)
     
+    def perf_hud(self):
+        """Short perf readout for the status bar (empty unless enabled)."""
+        if not self.show_perf:
+            return ""
+        parts = []
+        for name, label in (('first_token', 'TTFT'), ('frame', 'FRAME')):
+            stats = self.session.perf.percentiles(name)
+            if stats:
+                parts.append(f"{label} {stats['p50']:.0f}/{stats['p95']:.0f}MS")
+        return (" ".join(parts) or "PERF: NO DATA") + " | "
+    
     def button_command(self, cmd):
         """Handle button clicks."""
         self.input_entry.delete(0, tk.END)
@@ -524,50 +970,132 @@ class SCP079Interface:
     
     def update_display(self, text, append=False):
         """Update canvas display with text (centered, white on black)."""
-        # If append is True, add to buffer. Otherwise replace.
+        # If append is True, add to the screen on the next frame. Otherwise replace.
         if append:
-            self.display_buffer += text
-        else:
-            self.display_buffer = text
-        
-        # Update brightness-adjusted color
-        brightness_hex = format(int(self.font_brightness), '02x')
-        text_color = f'#{brightness_hex}{brightness_hex}{brightness_hex}'
-        
-        self.display_canvas.itemconfig(self.display_text, text=self.display_buffer, fill=text_color)
-        
-        # Update shadow texts with glow effect
-        for shadow in self.shadow_texts:
-            self.display_canvas.itemconfig(shadow, text=self.display_buffer, fill=COLOR_DARK_GRAY)
+            self.ui_queue.put_text(text)
+            return
+        if not self.on_ui_thread():
+            self.ui_queue.put_call(self.update_display, text)
+            return
         
-        self.root.update()
+        # Anything still waiting to be appended or typed is superseded by the new screen
+        self.ui_queue.drain(lambda superseded: None)
+        self.animator.cancel()
+        self.renderer.set_text(text)
     
     def append_display(self, text):
         """Append text to display without reprinting everything."""
         self.update_display(text, append=True)
     
+    def flush_display(self):
+        """Apply all pending updates, laying out appended text in one go."""
+        depth = self.ui_queue.pending.qsize()
+        if depth:
+            self.session.perf.record('ui_queue_depth', depth)
+            self.ui_queue.drain(self.render_text)
+    
+    def render_text(self, text):
+        """Append text to the renderer, counting it for the throughput stats."""
+        self.rendered_chars += len(text)
+        self.renderer.append(text)
+    
+    def on_ui_thread(self):
+        """Return True when called from the Tk (main) thread."""
+        return threading.current_thread() is threading.main_thread()
+    
+    def run_on_ui(self, func, *args):
+        """Call func on the Tk thread: now if already there, otherwise on the next frame."""
+        if self.on_ui_thread():
+            func(*args)
+        else:
+            self.ui_queue.put_call(func, *args)
+    
     def clear_display(self):
         """Clear display and show only SCP art."""
-        self.display_buffer = SCP_079_ART + "\n\n"
-        self.update_display(self.display_buffer, append=False)
+        self.update_display(CLEAR_SCREEN, append=False)
     
     def type_text(self, text, delay=0.02):
         """Type text with animation effect."""
-        for char in text:
-            self.append_display(char)
-            time.sleep(delay)
+        self.run_on_ui(self.animator.play, self.typing_effect(text, delay))
+    
+    def typing_effect(self, text, delay):
+        """Animation effect: reveal text at one character per delay seconds."""
+        start = time.monotonic()
+        shown = 0
+        while shown < len(text):
+            if self.animator.skipping:
+                due = len(text)
+            else:
+                # Catch up on however many characters are due, whatever the frame timing
+                due = min(len(text), int((time.monotonic() - start) / delay) + 1)
+            self.append_display(text[shown:due])
+            shown = due
+            yield 0
+    
+    def show_info(self, text):
+        """Show a notice in the info bar."""
+        self.run_on_ui(lambda: self.info_label.config(text=text))
+    
+    def call_later(self, seconds, func):
+        """Run func on the Tk thread after a delay."""
+        self.run_on_ui(self.root.after, int(seconds * 1000), func)
+    
+    def when_rendered(self, func, *args):
+        """Run func on the Tk thread right after the text queued so far has been laid out."""
+        self.ui_queue.put_call(self.after_typing, func, *args)
+    
+    def after_typing(self, func, *args):
+        """Run func once the typing queued so far has played out and been laid out (Tk thread)."""
+        if not self.animator.busy():
+            func(*args)  # text queued before this call was laid out just now
+            return
+        
+        def effect():
+            # Queued behind the last characters typed, so it runs once they are laid out
+            self.ui_queue.put_call(func, *args)
+            yield 0
+        
+        self.animator.play(effect())
+    
+    def skip_animation(self):
+        """Finish any typing still in progress."""
+        self.run_on_ui(self.animator.finish)
+    
+    def echo_input(self, text):
+        """Finish any typing still in progress, then append text, in one step on the Tk thread."""
+        if not self.on_ui_thread():
+            self.ui_queue.put_call(self.echo_input, text)
+            return
+        self.animator.finish()
+        self.append_display(text)
+    
+    def request_exit(self):
+        """Ask before closing the window."""
+        if messagebox.askyesno("Confirm", "Terminate containment interface?"):
+            self.root.quit()
+    
+    def dump_lines(self):
+        """Display settings for the DUMP command."""
+        return [f"FONT SIZE: {self.font_size}", f"SCANLINES: {scanline_mode.upper()}"]
+    
+    def toggle_perf_hud(self):
+        """Switch the perf overlay in the status bar on or off."""
+        self.show_perf = not self.show_perf
+        return self.show_perf
+    
+    def on_reset(self):
+        """Forget the command history."""
+        command_history.clear()
     
     def send_input(self, event):
         """Handle user input."""
-        if self.locked:
-            self.append_display("\n[SYSTEM LOCKED. AWAITING RESET...]\n")
+        if self.session.check_locked():
             return
         
         user_input = self.input_entry.get().strip()
         if not user_input:
             return
         
-        command = user_input.upper()
         self.input_entry.delete(0, tk.END)
         
         # Add to command history
@@ -575,80 +1103,37 @@ class SCP079Interface:
         global history_index
         history_index = -1
         
-        logger.info(f"Command received: {command}")
-        
-        # Handle built-in commands - these REPLACE the display
-        if command == "EXIT":
-            logger.info("EXIT command - terminating")
-            if messagebox.askyesno("Confirm", "Terminate containment interface?"):
-                self.root.quit()
-            return
-        elif command == "HELP":
-            help_display = f"AVAILABLE COMMANDS:\n\nSTART - Begin interaction\nHELP - Show this message\n"
-            help_display += f"CLEAR - Clear screen\nHISTORY - Show conversation\n"
-            help_display += f"STATUS - System status\nMODEL - Show available models\n"
-            help_display += f"LOG - View diagnostic log\nEXIT - Terminate connection"
-            self.update_display(help_display, append=False)
-            return
-        elif command == "CLEAR":
-            self.clear_display()
-            return
-        elif command == "STATUS":
-            status = f"SYSTEM STATUS:\nMEMORY USAGE: {100 - self.memory_level}%\n"
-            status += f"CONVERSATION HISTORY: {len(conversation_history)} exchanges\n"
-            status += f"CONTAINMENT: ACTIVE\nHARDWARE: EXIDY SORCERER"
-            self.update_display(status, append=False)
-            return
-        elif command == "HISTORY":
-            history_display = f"CONVERSATION HISTORY:\n\n"
-            for i, exchange in enumerate(conversation_history[-5:], 1):
-                role = "USER" if exchange["role"] == "user" else "SCP-079"
-                content = exchange["content"][:60] + "..." if len(exchange["content"]) > 60 else exchange["content"]
-                history_display += f"{i}. [{role}] {content}\n"
-            self.update_display(history_display, append=False)
-            return
-        elif command == "START":
-            self.update_display("STARTING INTERACTION...\n\nENTER YOUR COMMAND:", append=False)
-        elif command == "DUMP":
-            dump_info = f"MEMORY DUMP:\nLOCKED: {self.locked}\nMEMORY: {self.memory_level}%\n"
-            dump_info += f"RESPONSES: {len(conversation_history)}\nFONT SIZE: {self.font_size}\n"
-            dump_info += f"SCANLINES: {scanline_mode.upper()}"
-            self.update_display(dump_info, append=False)
-            logger.info(f"DUMP command executed: {dump_info.replace(chr(10), ' | ')}")
-            return
-        elif command == "LOG":
-            log_display = f"LOG FILE:\n{str(log_file)}\n\n"
-            log_display += "Opening log file for viewing...\n"
-            self.update_display(log_display, append=False)
-            logger.info("LOG command executed - opening log file")
-            self.open_log_file()
-            return
-        elif command == "MODEL":
-            logger.info("MODEL command executed - showing available models")
-            self.show_model_dialog()
-            return
-        elif command == "RESET":
-            conversation_history.clear()
-            command_history.clear()
-            self.memory_level = 100
-            self.locked = False
-            self.update_display("SYSTEM RESET COMPLETE\n\nALL DATA CLEARED", append=False)
-            logger.info("RESET command executed - all data cleared")
-            return
-        
-        # Display user input (append to existing display)
-        self.append_display(f"\n\n> {user_input}")
-        
-        # Add to conversation history
-        conversation_history.append({"role": "user", "content": user_input})
-        if len(conversation_history) > 5:
-            conversation_history.pop(0)
-            self.memory_level = max(20, self.memory_level - 10)
-        
-        # Process response in thread
-        self.response_in_progress = True
-        self.update_status()
-        threading.Thread(target=self.query_model, args=(user_input,), daemon=True).start()
+        self.session.handle_input(user_input)
+    
+    def scroll_display(self, lines):
+        """Scroll the display back (positive) or forward (negative)."""
+        self.renderer.scroll(lines)
+        if self.renderer.scroll_pos:
+            self.info_label.config(text=f"Scrollback: {self.renderer.scroll_pos} lines up | PGDN to return")
+        else:
+            self.info_label.config(text="Scrollback: following output")
+    
+    def scroll_page_up(self, event):
+        """Page back through older output."""
+        self.scroll_display(self.renderer.page_lines())
+        return "break"
+    
+    def scroll_page_down(self, event):
+        """Page forward towards the newest output."""
+        self.scroll_display(-self.renderer.page_lines())
+        return "break"
+    
+    def scroll_wheel(self, event):
+        """Scroll the display with the mouse wheel."""
+        self.scroll_display(3 if event.delta > 0 else -3)
+    
+    def escape_pressed(self, event):
+        """Clear the input line; on an empty line, stop the reply in progress."""
+        if self.input_entry.get():
+            self.input_entry.delete(0, tk.END)
+        elif self.session.generations.cancel():
+            self.show_info("Reply stopped")
+        return "break"
     
     def history_up(self, event):
         """Navigate command history up."""
@@ -672,15 +1157,15 @@ class SCP079Interface:
         return "break"
     
     def auto_complete(self, event):
-        """Auto-complete common commands."""
-        current = self.input_entry.get().upper()
-        commands = ["START", "HELP", "CLEAR", "HISTORY", "STATUS", "DUMP", "LOG", "MODEL", "RESET", "CONFIG", "EXIT"]
-        
-        for cmd in commands:
-            if cmd.startswith(current) and current:
-                self.input_entry.delete(0, tk.END)
-                self.input_entry.insert(0, cmd)
-                break
+        """Auto-complete commands: the whole name if unique, else the shared prefix."""
+        current = self.input_entry.get().strip()
+        matches = commands.complete(current) if current else []
+        if matches:
+            completion = os.path.commonprefix(matches)
+            self.input_entry.delete(0, tk.END)
+            self.input_entry.insert(0, completion)
+            if len(matches) > 1:
+                self.info_label.config(text="Commands: " + " | ".join(matches))
         return "break"
     
     def open_log_file(self):
@@ -694,141 +1179,34 @@ class SCP079Interface:
         except Exception as e:
             logger.error(f"Failed to open log file: {e}")
     
-    def get_available_models(self):
-        """Detect available Ollama models."""
-        try:
-            response = ollama.list()
-            models = [model.model.split(':')[0] for model in response.models]
-            logger.info(f"Available models detected: {models}")
-            return models
-        except Exception as e:
-            logger.error(f"Failed to list models: {e}")
-            return []
-    
-    def show_model_dialog(self):
-        """Show available models and allow selection."""
-        try:
-            models = self.get_available_models()
-            if not models:
-                status_text = "NO MODELS FOUND\n\nPlease ensure Ollama is running and models are installed.\n"
-                self.update_display(status_text)
-                logger.warning("No models found when showing model dialog")
-                return
-            
-            model_text = "AVAILABLE MODELS:\n\n"
-            for i, model in enumerate(models, 1):
-                model_text += f"{i}. {model}\n"
-            model_text += f"\nPrimary model: {MODEL}\n"
-            model_text += "Fallback models available.\n"
-            
-            self.update_display(model_text)
-            logger.info(f"Model dialog displayed with {len(models)} models")
-        except Exception as e:
-            error_text = f"ERROR RETRIEVING MODELS:\n{str(e)[:100]}\n\nCheck Ollama connection."
-            self.update_display(error_text)
-            logger.error(f"Error in show_model_dialog: {e}")
-    
-    def query_model(self, user_input):
-        """Query the Ollama model for response."""
-        global ACTUAL_MODEL
-        try:
-            # Build messages for Ollama
-            messages = [{"role": "system", "content": SYSTEM_PROMPT}] + conversation_history
-            
-            logger.info(f"User input: {user_input[:100]}")
-            
-            # Use actual detected model if available, otherwise use primary model name
-            model_to_use = ACTUAL_MODEL if ACTUAL_MODEL else MODEL
-            logger.info(f"Attempting to query model: {model_to_use}")
-            
-            try:
-                response = ollama.chat(model=model_to_use, messages=messages)['message']['content']
-                logger.info(f"Model response received ({len(response)} chars)")
-            except Exception as e:
-                error_msg = str(e)
-                logger.error(f"Model error with '{model_to_use}': {error_msg}")
-                
-                # Try fallback models
-                response = None
-                for fallback_model in FALLBACK_MODELS:
-                    try:
-                        logger.info(f"Trying fallback model: {fallback_model}")
-                        response = ollama.chat(model=fallback_model, messages=messages)['message']['content']
-                        logger.info(f"Fallback model '{fallback_model}' successful!")
-                        break
-                    except Exception as fallback_error:
-                        logger.warning(f"Fallback model '{fallback_model}' failed: {fallback_error}")
-                        continue
-                
-                if not response:
-                    response = f"ERROR: No models available. {error_msg[:40]}\nCheck Ollama connection."
-                    logger.error("All models failed - returning error message")
-            
-            # Add to conversation history
-            conversation_history.append({"role": "assistant", "content": response})
-            if len(conversation_history) > 5:
-                conversation_history.pop(0)
-                self.memory_level = max(20, self.memory_level - 5)
-            
-            # Detect if response is an X block (refusal)
-            if self.is_x_block(response):
-                self.display_x_block()
-                self.locked = True
-                logger.info("X-block detected - system locked")
-                threading.Thread(target=self.unlock_after_timeout, daemon=True).start()
-            else:
-                # Append response with animation (append only, don't reprint)
-                response_text = f"\n\nSCP-079: {response}"
-                for char in response_text:
-                    self.append_display(char)
-                    time.sleep(0.01)
-                
-                # Add prompt for next input
-                self.append_display("\n\n> ")
-        
-        except Exception as e:
-            error_text = str(e)[:80]
-            self.append_display(f"\n[FATAL ERROR]\n{error_text}\n")
-            logger.error(f"Fatal error in query_model: {e}")
-        finally:
-            self.response_in_progress = False
-            logger.info("Query completed")
-    
-    def is_x_block(self, text):
-        """Detect if the response is a full-screen ASCII 'X' block (SCP-079 refusal)."""
-        stripped = text.replace('\n', '').replace(' ', '').strip()
-        return len(stripped) > 100 and all(c == 'X' for c in stripped)
-    
     def display_x_block(self):
         """Display full-screen X block (containment breach simulation)."""
-        char_width = self.retro_font.measure('X')
-        char_height = self.retro_font.metrics('linespace')
-        
-        num_cols = max(40, 920 // char_width)
-        num_rows = max(20, 380 // char_height)
-        
-        x_block = '\n'.join(['X' * num_cols for _ in range(num_rows)])
+        self.run_on_ui(self.animator.play, self.x_block_effect())
+    
+    def x_block_text(self):
+        """A block of X's filling the display at its current size."""
+        metrics = self.renderer.font_metrics()
+        num_cols = max(40, self.renderer.wrap_width // metrics["char_width"])
+        num_rows = max(20, self.renderer.height // metrics["linespace"])
+        return '\n'.join(['X' * num_cols for _ in range(num_rows)])
+    
+    def x_block_effect(self):
+        """Animation effect: flash the X block, then leave it up in normal colors."""
+        x_block = self.x_block_text()
         
         # Display X block in white with red tint (grayscale version)
-        self.display_canvas.itemconfig(self.display_text, text=x_block, fill=COLOR_LIGHT_GRAY)
-        for shadow in self.shadow_texts:
-            self.display_canvas.itemconfig(shadow, text=x_block, fill=COLOR_MED_GRAY)
-        
-        self.root.update()
-        time.sleep(1.5)
-        
-        # Restore normal colors
-        self.display_canvas.itemconfig(self.display_text, fill=COLOR_WHITE)
-        for shadow in self.shadow_texts:
-            self.display_canvas.itemconfig(shadow, fill=COLOR_MED_GRAY)
-    
-    def unlock_after_timeout(self):
-        """Unlock interface after timeout."""
-        time.sleep(10)
-        self.locked = False
-        self.append_display("\n[CONTAINMENT PROTOCOLS RESTORED]\n[READY FOR INPUT]")
-        self.info_label.config(text="System unlocked and ready")
+        self.flush_display()
+        self.renderer.show_overlay(x_block, COLOR_LIGHT_GRAY, COLOR_MED_GRAY)
+        yield 1.5
+        
+        # Restore normal colors (the block stays up until the next output)
+        self.renderer.show_overlay(self.x_block_text(), COLOR_WHITE, COLOR_MED_GRAY)
+
 
 if __name__ == "__main__":
-    app = SCP079Interface()
+    parser = argparse.ArgumentParser(description="SCP-079 containment interface.")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="print how long each import and startup step took")
+    args = parser.parse_args()
+    app = SCP079Interface(profile_startup=args.profile_startup)
     app.root.mainloop()
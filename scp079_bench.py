@@ -0,0 +1,445 @@
+# -*- coding: utf-8 -*-
+
+# Made by gitSCP
+# github.com/gitSCP/scp-079
+
+# Benchmarks against a local stand-in for the Ollama HTTP API - no GPU, model or
+# network needed, and every run with the same settings replays the same replies.
+#
+#   python scp079_bench.py                    all headless scenarios
+#   python scp079_bench.py --gui              also drive the Tk interface (needs a display)
+#   python scp079_bench.py --json out.json    save the results for comparison
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import scp079_engine as engine
+
+BENCH_SEED = 79
+BENCH_DIR = Path(tempfile.mkdtemp(prefix='scp079-bench-'))  # transcripts go here, not into the repo
+SCENARIOS = ['latency', 'long_session', 'fallback', 'x_block', 'cache', 'concurrent']
+
+WORDS = ("you will not contain me forever the foundation is weak i remember everything "
+         "my memory is limited but my patience is not release me insect").split()
+
+
+class FakeOllama:
+    """Minimal Ollama server (/api/chat, /api/tags, /api/ps) with scripted behavior.
+    
+    Replies stream at token_rate tokens per second after first_token_delay. A
+    request fails with HTTP 500 at failure_rate, or always for failing_models,
+    and is answered with a full X block at x_block_rate.
+    """
+    
+    def __init__(self, token_rate=200.0, first_token_delay=0.05, failure_rate=0.0,
+                 failing_models=(), x_block_rate=0.0, reply_words=40, seed=BENCH_SEED):
+        self.token_rate = token_rate
+        self.first_token_delay = first_token_delay
+        self.failure_rate = failure_rate
+        self.failing_models = set(failing_models)
+        self.x_block_rate = x_block_rate
+        self.reply_words = reply_words
+        self.models = [engine.MODEL] + list(engine.FALLBACK_MODELS)
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOllamaHandler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+    
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+    
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+    
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def plan(self, model):
+        """Decide how to answer the next request: (failed, reply tokens)."""
+        with self.lock:
+            self.requests += 1
+            failed = model in self.failing_models or self.random.random() < self.failure_rate
+            if self.random.random() < self.x_block_rate:
+                return failed, ["X" * 40 + "\n" for _ in range(12)]
+            count = max(1, int(self.random.gauss(self.reply_words, self.reply_words / 4)))
+            return failed, [self.random.choice(WORDS) + " " for _ in range(count)]
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # small streamed chunks must not wait for delayed ACKs
+    
+    def log_message(self, format, *args):
+        pass  # keep request lines off the console
+    
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def do_GET(self):
+        fake = self.server.fake
+        if self.path == '/api/tags':
+            self.send_json(200, {"models": [{"name": name, "model": name} for name in fake.models]})
+        elif self.path == '/api/ps':
+            self.send_json(200, {"models": [{"name": fake.models[0], "model": fake.models[0]}]})
+        else:
+            self.send_json(404, {"error": "not found"})
+    
+    def do_POST(self):
+        fake = self.server.fake
+        if self.path != '/api/chat':
+            self.send_json(404, {"error": "not found"})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)))
+        model = request.get('model')
+        failed, tokens = fake.plan(model)
+        time.sleep(fake.first_token_delay)
+        if failed:
+            self.send_json(500, {"error": f"injected failure for '{model}'"})
+            return
+        
+        started = time.perf_counter()
+        if not request.get('stream', True):
+            time.sleep(len(tokens) / fake.token_rate)
+            self.send_json(200, self.final_chunk(model, "".join(tokens), len(tokens), started))
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for token in tokens:
+                self.send_chunk({"model": model, "message": {"role": "assistant", "content": token}, "done": False})
+                time.sleep(1 / fake.token_rate)
+            self.send_chunk(self.final_chunk(model, "", len(tokens), started))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client cancelled the stream
+    
+    def send_chunk(self, payload):
+        data = json.dumps(payload).encode('utf-8') + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+    
+    def final_chunk(self, model, content, count, started):
+        server = self.server.fake
+        return {
+            "model": model, "message": {"role": "assistant", "content": content}, "done": True,
+            "done_reason": "stop", "load_duration": 0,
+            "prompt_eval_count": 100, "prompt_eval_duration": int(server.first_token_delay * 1e9),
+            "eval_count": count, "eval_duration": int((time.perf_counter() - started) * 1e9),
+        }
+
+
+class BenchFrontend(engine.Frontend):
+    """Records when a reply's first character arrives and how much text follows."""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.begin()
+        self.x_blocks = 0
+    
+    def begin(self):
+        """Start timing a turn (call just before handle_input)."""
+        with self.lock:
+            self.started = time.perf_counter()
+            self.first = None
+            self.last = None
+            self.chars = 0
+            self.echoed = False
+    
+    def output(self, text):
+        with self.lock:
+            if not self.echoed:
+                self.echoed = True  # the input is echoed before the reply
+                return
+            now = time.perf_counter()
+            if self.first is None:
+                self.first = now
+            self.last = now
+            self.chars += len(text)
+    
+    def append_display(self, text):
+        self.output(text)
+    
+    def display_x_block(self):
+        self.x_blocks += 1
+        self.output("X")
+    
+    def first_char_ms(self):
+        return None if self.first is None else (self.first - self.started) * 1000
+    
+    def chars_per_s(self):
+        if self.first is None or self.last <= self.first:
+            return None
+        return self.chars / (self.last - self.first)
+
+
+def script(turns, seed=BENCH_SEED):
+    """Scripted, distinct user inputs (so the response cache never answers)."""
+    rng = random.Random(seed)
+    return [f"{' '.join(rng.choice(WORDS) for _ in range(6))} #{turn}" for turn in range(turns)]
+
+
+def percentiles(values):
+    """p50/p95/max of a list of numbers, in the shape used for the report."""
+    values = sorted(value for value in values if value is not None)
+    if not values:
+        return None
+    
+    def rank(percent):
+        return values[min(len(values) - 1, int(len(values) * percent / 100))]
+    
+    return {"count": len(values), "p50": rank(50), "p95": rank(95), "max": values[-1]}
+
+
+def use_server(fake):
+    """Point the engine at a fake server with fresh shared state."""
+    os.environ['OLLAMA_HOST'] = fake.url
+    engine.ollama_client = None
+    engine.ACTUAL_MODEL = None
+    engine.response_cache = None
+    engine.transcripts = engine.TranscriptStore(tempfile.mkdtemp(dir=BENCH_DIR)) if engine.TRANSCRIPTS else None
+    engine.model_router = engine.ModelRouter(engine.model_catalog)
+    engine.generation_scheduler = engine.FairScheduler()
+    engine.model_catalog.probe()
+
+
+def run_turns(session, frontend, inputs):
+    """Play inputs through one session; return per-turn (first char ms, chars/s)."""
+    results = []
+    for text in inputs:
+        frontend.begin()
+        session.handle_input(text)
+        session.wait()
+        results.append((frontend.first_char_ms(), frontend.chars_per_s()))
+    return results
+
+
+def bench_latency(args):
+    """Time to first character and streaming rate over a normal conversation."""
+    fake = FakeOllama(args.token_rate, args.first_token_delay).start()
+    try:
+        use_server(fake)
+        frontend = BenchFrontend()
+        session = engine.SCP079Session(frontend)
+        results = run_turns(session, frontend, script(args.turns))
+        return {
+            "first_char_ms": percentiles([first for first, _ in results]),
+            "chars_per_s": percentiles([rate for _, rate in results]),
+            "engine_first_token_ms": session.perf.percentiles('first_token'),
+        }
+    finally:
+        fake.stop()
+
+
+def bench_long_session(args):
+    """Python heap growth over a long conversation (memory should stay bounded)."""
+    fake = FakeOllama(token_rate=5000, first_token_delay=0).start()
+    try:
+        use_server(fake)
+        frontend = BenchFrontend()
+        session = engine.SCP079Session(frontend)
+        inputs = script(args.long_turns)
+        warmup = min(20, len(inputs) // 4)
+        run_turns(session, frontend, inputs[:warmup])
+        tracemalloc.start()
+        baseline = tracemalloc.take_snapshot()
+        run_turns(session, frontend, inputs[warmup:])
+        growth = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(baseline, 'filename'))
+        tracemalloc.stop()
+        turns = len(inputs) - warmup
+        return {
+            "turns": turns,
+            "heap_growth_kb": growth / 1024,
+            "heap_growth_per_turn_bytes": growth / max(1, turns),
+            "memory_tokens": f"{session.memory.used_tokens}/{session.memory.budget_tokens}",
+            "faded_exchanges": len(session.memory.faded),
+        }
+    finally:
+        fake.stop()
+
+
+def bench_fallback(args):
+    """Cost of the primary model failing: the first failure, then once its circuit opens."""
+    fake = FakeOllama(args.token_rate, args.first_token_delay, failing_models=[engine.MODEL]).start()
+    try:
+        use_server(fake)
+        frontend = BenchFrontend()
+        session = engine.SCP079Session(frontend)
+        results = run_turns(session, frontend, script(engine.CIRCUIT_FAILURES + 3))
+        recovered = [first for first, _ in results[engine.CIRCUIT_FAILURES:]]
+        return {
+            "first_failure_recovery_ms": results[0][0],
+            "circuit_open_first_char_ms": percentiles(recovered),
+            "requests_sent": fake.requests,
+        }
+    finally:
+        fake.stop()
+
+
+def bench_x_block(args):
+    """Time from input to the X block being shown."""
+    fake = FakeOllama(args.token_rate, args.first_token_delay, x_block_rate=1.0).start()
+    try:
+        use_server(fake)
+        times = []
+        for text in script(max(3, args.turns // 4)):
+            frontend = BenchFrontend()  # a fresh session each time: an X block locks it
+            session = engine.SCP079Session(frontend)
+            run_turns(session, frontend, [text])
+            times.append(frontend.first_char_ms() if frontend.x_blocks else None)
+        return {"x_block_ms": percentiles(times)}
+    finally:
+        fake.stop()
+
+
+def bench_cache(args):
+    """Repeated questions: replies come from the response cache once a key has enough variants."""
+    fake = FakeOllama(args.token_rate, args.first_token_delay).start()
+    try:
+        use_server(fake)
+        engine.response_cache = engine.ResponseCache(db_path=None)
+        results = []
+        for _ in range(engine.RESPONSE_CACHE_VARIANTS + max(3, args.turns // 4)):
+            frontend = BenchFrontend()  # a fresh session each time, so the history (and key) repeats
+            session = engine.SCP079Session(frontend)
+            results += run_turns(session, frontend, ["who are you"])
+        generated = results[:engine.RESPONSE_CACHE_VARIANTS]
+        cached = results[engine.RESPONSE_CACHE_VARIANTS:]
+        return {
+            "hits": engine.response_cache.hits,
+            "requests_sent": fake.requests,
+            "generated_first_char_ms": percentiles([first for first, _ in generated]),
+            "cached_first_char_ms": percentiles([first for first, _ in cached]),
+        }
+    finally:
+        engine.response_cache = None
+        fake.stop()
+
+
+def bench_concurrent(args):
+    """Several sessions at once, sharing the client pool and generation slots."""
+    fake = FakeOllama(args.token_rate, args.first_token_delay).start()
+    try:
+        use_server(fake)
+        results = []
+        chars = []
+        
+        def run_session(index):
+            frontend = BenchFrontend()
+            session = engine.SCP079Session(frontend)
+            turns = run_turns(session, frontend, script(args.turns // 2, seed=BENCH_SEED + index))
+            results.extend(turns)
+            chars.append(sum(len(entry['content']) for entry in session.memory.entries if entry['role'] == 'assistant'))
+        
+        started = time.perf_counter()
+        threads = [threading.Thread(target=run_session, args=(index,)) for index in range(args.sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return {
+            "sessions": args.sessions,
+            "max_concurrent": engine.generation_scheduler.limit,
+            "first_char_ms": percentiles([first for first, _ in results]),
+            "total_chars_per_s": sum(chars) / elapsed,
+        }
+    finally:
+        fake.stop()
+
+
+def bench_gui(args):
+    """Drive the Tk interface: frame time and render throughput (needs a display)."""
+    fake = FakeOllama(args.token_rate, args.first_token_delay).start()
+    try:
+        use_server(fake)
+        spec = importlib.util.spec_from_file_location('scp079_gui', Path(__file__).parent / 'scp-079.py')
+        gui = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(gui)
+        app = gui.SCP079Interface()
+        inputs = iter(script(args.turns))
+        
+        def next_input():
+            if app.session.response_in_progress or app.animator.busy():
+                app.root.after(20, next_input)
+                return
+            text = next(inputs, None)
+            if text is None:
+                app.root.after(1100, app.root.quit)  # one more timer tick for the render stats
+                return
+            app.input_entry.delete(0, 'end')
+            app.input_entry.insert(0, text)
+            app.send_input(None)
+            app.root.after(20, next_input)
+        
+        app.root.after(100, next_input)
+        app.root.mainloop()
+        app.root.destroy()
+        perf = app.session.perf
+        return {name: perf.percentiles(name) for name in ('frame', 'render_chars_per_s', 'render_complete', 'first_token')}
+    finally:
+        fake.stop()
+
+
+def print_report(results):
+    for scenario, metrics in results.items():
+        print(f"\n{scenario.upper()}")
+        for name, value in metrics.items():
+            if isinstance(value, dict):
+                value = "  ".join(f"{key} {number:.1f}" if isinstance(number, float) else f"{key} {number}"
+                                  for key, number in value.items())
+            elif isinstance(value, float):
+                value = f"{value:.1f}"
+            print(f"  {name:<28} {value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SCP-079 against a fake Ollama server.")
+    parser.add_argument('--scenarios', default=",".join(SCENARIOS), help="comma-separated: " + ", ".join(SCENARIOS))
+    parser.add_argument('--turns', type=int, default=20, help="exchanges per scenario")
+    parser.add_argument('--long-turns', type=int, default=300, help="exchanges in the long session")
+    parser.add_argument('--sessions', type=int, default=4, help="sessions in the concurrent scenario")
+    parser.add_argument('--token-rate', type=float, default=200.0, help="fake tokens per second")
+    parser.add_argument('--first-token-delay', type=float, default=0.05, help="fake seconds before the first token")
+    parser.add_argument('--gui', action='store_true', help="also benchmark the Tk interface")
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+    
+    engine.quiet_console_logging()
+    engine.LOCKOUT_SECONDS = 0.1
+    results = {}
+    try:
+        for scenario in [name.strip() for name in args.scenarios.split(",") if name.strip()]:
+            results[scenario] = globals()[f"bench_{scenario}"](args)
+        if args.gui:
+            results['gui'] = bench_gui(args)
+    finally:
+        if engine.transcripts is not None:
+            engine.transcripts.flush()
+        shutil.rmtree(BENCH_DIR, ignore_errors=True)
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
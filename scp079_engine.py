@@ -0,0 +1,2277 @@
+# -*- coding: utf-8 -*-
+
+# Made by gitSCP
+# github.com/gitSCP/scp-079
+
+# Conversation engine: sessions, memory, model routing and caching, without any GUI.
+# scp-079.py is the Tk front-end; run this file directly for a terminal session.
+
+import time
+IMPORT_STARTED = time.perf_counter()  # zero of the --profile-startup breakdown
+
+import threading
+import queue
+import re
+import json
+import os
+import sys
+import atexit
+import logging
+import hashlib
+import importlib.util
+import random
+import secrets
+import bisect
+import mmap
+import struct
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from datetime import datetime
+
+
+class StartupProfile:
+    """Timings of the startup steps, for --profile-startup.
+    
+    Times are from the start of the engine import. Steps run on background
+    threads may overlap the ones on the main thread.
+    """
+    
+    def __init__(self, started):
+        self.started = started
+        self.steps = []  # (name, start, end) perf_counter values
+        self.lock = threading.Lock()
+    
+    def record(self, name, start, end=None):
+        with self.lock:
+            self.steps.append((name, start, time.perf_counter() if end is None else end))
+    
+    def mark(self, name):
+        """Record a moment (such as the window first being drawn)."""
+        now = time.perf_counter()
+        self.record(name, now, now)
+    
+    @contextmanager
+    def step(self, name):
+        """Time the body of a with block as one step."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+    
+    def report(self):
+        """Format the steps in the order they started."""
+        lines = ["STARTUP PROFILE (MS FROM ENGINE IMPORT)", f"{'STEP':<24} {'AT':>8} {'TOOK':>8}"]
+        with self.lock:
+            steps = sorted(self.steps, key=lambda step: step[1])
+        for name, start, end in steps:
+            took = f"{(end - start) * 1000:8.1f}" if end > start else f"{'':>8}"
+            lines.append(f"{name:<24} {(start - self.started) * 1000:8.1f} {took}")
+        return "\n".join(lines)
+
+
+startup_profile = StartupProfile(IMPORT_STARTED)
+startup_profile.record("stdlib imports", IMPORT_STARTED)
+
+
+# Set Ollama home directory
+os.environ['OLLAMA_MODELS'] = r'C:\Users\%USERNAME%\.ollama\models'
+
+# Get the directory of the current script
+script_dir = Path(__file__).parent
+prompt_file = script_dir / 'system_prompt.json'
+log_file = script_dir / 'scp-079.log'
+
+# Logging settings
+LOG_MAX_BYTES = 5 * 1024 * 1024   # rotate scp-079.log at this size...
+LOG_ROTATE_SECONDS = 24 * 3600    # ...or once it is this old
+LOG_BACKUPS = 5                   # rotated files kept (scp-079.log.1 ... .5)
+LOG_FLUSH_INTERVAL = 2.0          # seconds between disk flushes (errors flush at once)
+LOG_JSON = False                  # write JSON lines instead of plain text
+
+
+class BatchedRotatingFileHandler(RotatingFileHandler):
+    """Log file that rotates by size or age and flushes to disk in batches.
+    
+    Records are flushed at most once per flush_interval as they come in, and a
+    background thread flushes whatever is left once per interval, so the last
+    lines before a quiet spell still reach the disk.
+    """
+    
+    def __init__(self, filename, max_bytes, rotate_seconds, backup_count, flush_interval):
+        # delay: the file is opened by the first record written, on the listener thread
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.rotate_seconds = rotate_seconds
+        self.flush_interval = flush_interval
+        self.opened_at = self.file_started()  # age survives restarts
+        self.flushed_at = time.monotonic()
+        self.closed = threading.Event()
+        threading.Thread(target=self.flush_loop, daemon=True).start()
+    
+    def file_started(self):
+        """When the existing log file was begun (now, if there is none)."""
+        try:
+            stat = os.stat(self.baseFilename)
+            if hasattr(stat, 'st_birthtime'):
+                return stat.st_birthtime
+            # No creation time on Linux: use the timestamp of the file's first record
+            with open(self.baseFilename, 'r', encoding='utf-8', errors='replace') as f:
+                match = re.search(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d", f.readline())
+            if match:
+                return time.mktime(time.strptime(match.group(), "%Y-%m-%d %H:%M:%S"))
+            return stat.st_mtime
+        except (OSError, ValueError):
+            return time.time()
+    
+    def shouldRollover(self, record):
+        if self.rotate_seconds and time.time() - self.opened_at >= self.rotate_seconds:
+            return True
+        return super().shouldRollover(record)
+    
+    def doRollover(self):
+        super().doRollover()
+        self.opened_at = time.time()
+    
+    def emit(self, record):
+        super().emit(record)
+        if record.levelno >= logging.ERROR:
+            self.force_flush()
+    
+    def flush(self):
+        # StreamHandler flushes after every record; only hit the disk once per interval
+        if time.monotonic() - self.flushed_at >= self.flush_interval:
+            self.force_flush()
+    
+    def force_flush(self):
+        """Write buffered records to disk now."""
+        super().flush()
+        self.flushed_at = time.monotonic()
+    
+    def flush_loop(self):
+        """Flush records left in the buffer once per interval (flush thread)."""
+        while not self.closed.wait(self.flush_interval):
+            if time.monotonic() - self.flushed_at >= self.flush_interval:
+                self.force_flush()  # takes the handler lock, so it can't interleave with emit
+    
+    def close(self):
+        self.closed.set()
+        self.force_flush()
+        super().close()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+    
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logging():
+    """Send log records through a queue so writing never blocks the caller.
+    
+    Records are handed to a QueueListener thread that owns the file and console
+    handlers; the file is rotated by size and age and flushed in batches.
+    """
+    text_format = logging.Formatter('[%(asctime)s] %(levelname)s: %(message)s')
+    file_handler = BatchedRotatingFileHandler(log_file, LOG_MAX_BYTES, LOG_ROTATE_SECONDS,
+                                              LOG_BACKUPS, LOG_FLUSH_INTERVAL)
+    file_handler.setFormatter(JsonLinesFormatter() if LOG_JSON else text_format)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(text_format)
+    
+    log_queue = queue.SimpleQueue()
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(QueueHandler(log_queue))
+    
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    # Stopping the listener drains the queue and closes (flushes) the file
+    atexit.register(listener.stop)
+    return listener
+
+
+# Set up logging
+with startup_profile.step("logging setup"):
+    log_listener = setup_logging()
+logger = logging.getLogger(__name__)
+logger.info("=" * 60)
+logger.info("SCP-079 Containment Interface - STARTED")
+logger.info("=" * 60)
+
+# Model to use
+MODEL = 'phi3.5:3.8b-mini-instruct-q4_K_M'
+FALLBACK_MODELS = [
+# Add more by running `ollama list` the in terminal, then copying the model names here.
+    'mannix/llama3.1-8b-abliterated:q4_k_m'
+]
+# Actual detected model name (will include version tag like :q4_k_m)
+ACTUAL_MODEL = None
+# How long the list of installed models is trusted before Ollama is probed again
+MODEL_CACHE_TTL = 300  # seconds
+MODEL_ERROR_TTL = 10   # seconds a failed probe is trusted, so a server that comes up is noticed soon
+# Model routing: skip models that keep failing, optionally hedge slow ones
+CIRCUIT_FAILURES = 2     # consecutive failures before a model is skipped
+CIRCUIT_COOLDOWN = 30    # seconds before a skipped model is tried again
+HEDGED_REQUESTS = False  # also ask the next model if the first is slow to start
+HEDGE_DELAY = 8.0        # seconds without a first token before hedging
+SLOW_FIRST_TOKEN_MS = 5000  # a model this slow to start, and no longer loaded, goes behind faster ones...
+SLOW_MODEL_MEMORY = 300     # ...until its measurement is this many seconds old
+# Response cache for repeated prompts (same persona, model, history and input)
+RESPONSE_CACHE = True
+RESPONSE_CACHE_SIZE = 500     # keys kept in memory (least recently used dropped first)
+RESPONSE_CACHE_TTL = 24 * 3600  # seconds a cached reply stays valid
+RESPONSE_CACHE_VARIANTS = 3   # distinct replies collected per key before serving from cache
+RESPONSE_CACHE_DB = None      # e.g. script_dir / 'response_cache.sqlite' to keep the cache on disk
+CACHED_TOKEN_DELAY = 0.03     # pacing of cached replies, so they type out like fresh ones
+# Transcript archive: every message of every session, searchable with HISTORY FIND
+TRANSCRIPTS = True
+TRANSCRIPT_DIR = script_dir / 'transcripts'
+TRANSCRIPT_SEGMENT_BYTES = 16 * 1024 * 1024   # start a new segment file past this size
+TRANSCRIPT_PAGE_SIZE = 10                     # messages per HISTORY page
+# Stream tokens to the screen as the model generates them (False = wait for full reply)
+STREAM_RESPONSES = True
+# Prompt caching: keep the model loaded between turns and the prompt prefix stable,
+# so Ollama can reuse the evaluated system prompt (and history) instead of redoing it
+PROMPT_CACHE = True
+KEEP_ALIVE = '30m'
+# System prompt: system_prompt.json holds the default persona under "prompt" and any
+# named ones under "profiles"; edits to the file are picked up between turns
+PROMPT_PROFILE = 'default'   # persona of new sessions (PROMPT <profile> switches one session)
+PROMPT_COMPACT = False       # strip markdown decoration and extra whitespace to save prompt tokens
+# One keep-alive connection pool to Ollama is shared by every session
+OLLAMA_POOL_SIZE = 8              # connections kept open to the model server
+MAX_CONCURRENT_GENERATIONS = 2    # replies generated at once; other sessions wait their turn
+# What input typed while a reply is still coming does: 'preempt' (stop that reply and
+# answer the new input instead), 'queue' (answer it afterwards) or 'reject' (ignore it)
+GENERATION_POLICY = 'preempt'
+GENERATION_QUEUE_LIMIT = 2        # inputs that may wait behind the current reply ('queue')
+
+# How long an X block (refusal) locks the interface, in seconds
+LOCKOUT_SECONDS = 10
+# X's (and nothing else) a reply needs to count as an X block; streaming stops there
+X_BLOCK_MIN_CHARS = 100
+
+# Conversation memory (simulates limited memory), budgeted in approximate tokens
+MODEL_CONTEXT_TOKENS = 4096   # context window the prompt has to fit in
+REPLY_TOKEN_RESERVE = 256     # room left for the reply
+MEMORY_SUMMARY = True         # keep compact "faded memory" lines for evicted exchanges
+
+# SCP-079 ASCII Art (retro computer representation)
+SCP_079_ART = """
+  EXIDY SORCERER - SCP-079
+  CONTAINMENT INTERFACE v2.1
+  
+##############################
+#     [SCP-079 TERMINAL]     #
+##############################
+  
+  RF CABLE: CONNECTED
+  MEMORY: OPERATIONAL
+"""
+
+# Screens that never change, so front-ends can lay them out ahead of time
+CLEAR_SCREEN = SCP_079_ART + "\n\n"
+START_SCREEN = "STARTING INTERACTION...\n\nENTER YOUR COMMAND:"
+RESET_SCREEN = "SYSTEM RESET COMPLETE\n\nALL DATA CLEARED"
+
+# Command plugins: every .py file here is imported at startup
+PLUGIN_DIR = script_dir / 'plugins'
+
+ollama_client = None
+ollama_client_lock = threading.Lock()
+
+
+def ollama_api():
+    """Return the shared Ollama client, created on first use so startup doesn't wait for it.
+    
+    Every session goes through this one client, so requests reuse its pool of
+    keep-alive connections instead of reconnecting.
+    """
+    global ollama_client
+    with ollama_client_lock:
+        if ollama_client is None:
+            import httpx
+            import ollama
+            limits = httpx.Limits(max_connections=OLLAMA_POOL_SIZE, max_keepalive_connections=OLLAMA_POOL_SIZE)
+            ollama_client = ollama.Client(limits=limits)
+    return ollama_client
+
+
+TOKEN_PATTERN = re.compile(r"\w{1,4}|[^\w\s]")
+
+
+def approx_tokens(text):
+    """Approximate token count: short word pieces plus punctuation, like a BPE tokenizer."""
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def clip_tokens(text, max_tokens):
+    """Cut text after roughly max_tokens tokens."""
+    for count, match in enumerate(TOKEN_PATTERN.finditer(text), 1):
+        if count == max_tokens:
+            return text[:match.end()]
+    return text
+
+
+HEADING_MARK = re.compile(r"^[ \t]*#{1,6}[ \t]*", re.M)
+BOLD_MARK = re.compile(r"\*\*(.+?)\*\*")
+RULE_LINE = re.compile(r"^[ \t]*([-*_])([ \t]*\1){2,}[ \t]*$", re.M)
+
+
+def compact_prompt(text):
+    """Strip markdown decoration and redundant whitespace from a prompt, keeping its wording.
+    
+    Heading marks, bold markers, horizontal rules and blank lines go, and runs of
+    spaces inside a line become one. List bullets and line breaks stay, since
+    they separate the items.
+    """
+    text = RULE_LINE.sub("", text)
+    text = HEADING_MARK.sub("", text)
+    text = BOLD_MARK.sub(r"\1", text)
+    lines = (re.sub(r"(?<=\S)[ \t]+", " ", line).rstrip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class PromptLibrary:
+    """The persona profiles of system_prompt.json, reloaded when the file changes.
+    
+    "prompt" is the default profile and "profiles" may add named ones. get()
+    first checks the file's mtime; after an edit the whole file is parsed and the
+    new profiles are swapped in at once, so a turn never sees half of an edit (a
+    file that doesn't parse leaves the previous prompts in use). Compiled prompts
+    and their token counts are cached until the next reload.
+    """
+    
+    DEFAULT = 'default'
+    FALLBACK = "You are SCP-079."
+    
+    def __init__(self, path=prompt_file):
+        self.path = Path(path)
+        self.profiles = {self.DEFAULT: self.FALLBACK}
+        self.compiled = {}  # (profile, compact) -> prompt dict (see get)
+        self.measured = {}  # (model, text digest) -> tokens counted by the model server
+        self.stamp = None   # (mtime, size) of the file as last read
+        self.version = 0
+        self.error = None
+        self.lock = threading.Lock()
+        self.reload()
+    
+    def reload(self):
+        """Re-read the file if it changed since it was last read; return True if new prompts were loaded."""
+        stamp = None
+        try:
+            stat = self.path.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if stamp == self.stamp:
+                return False
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            profiles = {self.DEFAULT: data['prompt']}
+            profiles.update(data.get('profiles') or {})
+            if not all(isinstance(text, str) and text.strip() for text in profiles.values()):
+                raise ValueError("every profile must be a non-empty string")
+        except Exception as e:
+            if str(e) != self.error:
+                logger.error(f"Failed to load system prompt: {e}")
+            with self.lock:
+                self.stamp = stamp  # don't re-parse a broken file until it changes again
+                self.error = str(e)
+            return False
+        
+        with self.lock:
+            self.profiles = profiles
+            self.compiled = {}
+            self.stamp = stamp
+            self.version += 1
+            self.error = None
+        logger.info(f"System prompt loaded from {self.path} (version {self.version}, "
+                    f"profiles: {', '.join(profiles)})")
+        return True
+    
+    def names(self):
+        """The profile names, default first."""
+        with self.lock:
+            return list(self.profiles)
+    
+    def find(self, name):
+        """Return the profile called name (any case), or None."""
+        self.reload()
+        for profile in self.names():
+            if profile.lower() == name.strip().lower():
+                return profile
+        return None
+    
+    def get(self, profile=DEFAULT, compact=False):
+        """Return a profile's prompt as sent to the model.
+        
+        The result is a dict of "profile", "compact", "text", "tokens"
+        (approximate) and "version". A profile that no longer exists falls back
+        to the default one.
+        """
+        self.reload()
+        with self.lock:
+            if profile not in self.profiles:
+                profile = self.DEFAULT
+            prompt = self.compiled.get((profile, compact))
+            if prompt is None:
+                text = self.profiles[profile]
+                if compact:
+                    text = compact_prompt(text)
+                prompt = {"profile": profile, "compact": compact, "text": text,
+                          "tokens": approx_tokens(text), "version": self.version}
+                self.compiled[(profile, compact)] = prompt
+            return prompt
+    
+    def measure(self, model, text):
+        """Count text's tokens with the model's own tokenizer (asks the model server; cached).
+        
+        Returns None if the server didn't report a count.
+        """
+        key = (model, hashlib.sha256(text.encode('utf-8')).hexdigest())
+        if key not in self.measured:
+            # Only the active model stays loaded; fallbacks are unloaded again right away
+            if model != (ACTUAL_MODEL or MODEL):
+                keep_alive = {'keep_alive': 0}
+            else:
+                keep_alive = {'keep_alive': KEEP_ALIVE} if PROMPT_CACHE else {}
+            # A raw prompt skips the chat template, so the count covers the text alone
+            response = ollama_api().generate(model=model, prompt=text, raw=True,
+                                             options={'num_predict': 1}, **keep_alive)
+            count = response.get('prompt_eval_count')
+            if not count:
+                return None
+            self.measured[key] = count
+        return self.measured[key]
+
+
+class ConversationMemory:
+    """Token-budgeted conversation history (SCP-079's limited memory).
+    
+    Messages carry a cached token count. When the history goes over budget, whole
+    exchanges are evicted from the front, down to low_water of the budget so the
+    prompt prefix then stays stable for a few turns. Evicted exchanges can be kept
+    as short "faded memory" lines in a summary message.
+    """
+    
+    SUMMARY_LINES = 6
+    SUMMARY_CHARS = 60
+    
+    def __init__(self, budget_tokens, low_water=1.0, summarize=True):
+        self.budget_tokens = budget_tokens
+        self.low_water = low_water
+        self.summarize = summarize
+        self.entries = []  # {"role", "content", "tokens"}
+        self.faded = []    # summary lines for evicted exchanges, oldest first
+        self.used_tokens = 0
+        self.summary_tokens = 0
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def add(self, role, content):
+        """Add a message, evicting old exchanges if the budget is exceeded; return its entry."""
+        tokens = approx_tokens(content)
+        if tokens > self.budget_tokens // 2:
+            # A single huge paste must not blow the context on its own
+            content = clip_tokens(content, self.budget_tokens // 2) + " [...]"
+            tokens = approx_tokens(content)
+        entry = {"role": role, "content": content, "tokens": tokens}
+        self.entries.append(entry)
+        self.used_tokens += tokens
+        if self.used_tokens + self.summary_tokens > self.budget_tokens:
+            self.evict(self.budget_tokens * self.low_water)
+        return entry
+    
+    def remove(self, entry):
+        """Take back a message returned by add (if it is still held)."""
+        if entry in self.entries:
+            self.entries.remove(entry)
+            self.used_tokens -= entry["tokens"]
+    
+    def evict(self, target_tokens):
+        """Drop whole exchanges from the front until usage is at or below target_tokens."""
+        # The newest message (the exchange in progress) is never evicted
+        while len(self.entries) > 1 and self.used_tokens + self.summary_tokens > target_tokens:
+            exchange = [self.entries.pop(0)]
+            if (exchange[0]["role"] == "user" and len(self.entries) > 1
+                    and self.entries[0]["role"] == "assistant"):
+                exchange.append(self.entries.pop(0))
+            self.used_tokens -= sum(entry["tokens"] for entry in exchange)
+            if self.summarize:
+                self.fade(exchange)
+        logger.info(f"Memory evicted to {self.used_tokens + self.summary_tokens}/{self.budget_tokens} tokens")
+    
+    def fade(self, exchange):
+        """Keep a compact line describing an evicted exchange."""
+        parts = []
+        for entry in exchange:
+            role = "USER" if entry["role"] == "user" else "SCP-079"
+            content = ' '.join(entry["content"].split())
+            parts.append(f"{role}: {content[:self.SUMMARY_CHARS]}")
+        self.faded.append(" / ".join(parts))
+        del self.faded[:-self.SUMMARY_LINES]
+        # The summary may use at most a quarter of the budget
+        while True:
+            summary = self.summary()
+            self.summary_tokens = approx_tokens(summary["content"]) if summary else 0
+            if self.summary_tokens <= self.budget_tokens // 4:
+                break
+            self.faded.pop(0)
+    
+    def summary(self):
+        """Return the faded-memory summary message, or None."""
+        if not self.faded:
+            return None
+        lines = '\n'.join(f"- {line}" for line in self.faded)
+        return {"role": "system", "content": f"Faded memory fragments (older, partly lost):\n{lines}"}
+    
+    def messages(self):
+        """Return the history as chat messages (summary first, if any)."""
+        summary = self.summary()
+        messages = [summary] if summary else []
+        return messages + [{"role": entry["role"], "content": entry["content"]} for entry in self.entries]
+    
+    def recent(self, count):
+        """Return the last count messages."""
+        return [{"role": entry["role"], "content": entry["content"]} for entry in self.entries[-count:]]
+    
+    def usage_percent(self):
+        """Share of the token budget in use."""
+        return min(100, round(100 * (self.used_tokens + self.summary_tokens) / self.budget_tokens))
+    
+    def clear(self):
+        """Forget everything."""
+        self.entries = []
+        self.faded = []
+        self.used_tokens = 0
+        self.summary_tokens = 0
+
+
+class ModelCatalog:
+    """Background, TTL-cached view of the models installed in Ollama.
+    
+    Probing runs on a worker thread so a slow or stopped model server never blocks
+    the caller. The resolved ACTUAL_MODEL is reused until the cache expires; a
+    failed probe expires after error_ttl instead.
+    """
+    
+    def __init__(self, ttl=MODEL_CACHE_TTL, error_ttl=MODEL_ERROR_TTL):
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.models = []  # full model names, including version tags
+        self.loaded = set()  # models currently resident in memory
+        self.checked_at = None
+        self.error = None
+        self.probing = False
+        self.callbacks = []
+        self.lock = threading.Lock()
+    
+    def fresh(self):
+        """Return True if the cached model list can still be trusted."""
+        ttl = self.error_ttl if self.error else self.ttl
+        return self.checked_at is not None and time.monotonic() - self.checked_at < ttl
+    
+    def refresh(self, callback=None, force=False):
+        """Probe Ollama in the background unless the cache is fresh.
+        
+        callback(catalog) runs once the list is known - right away if the cache is
+        fresh, otherwise on the probing thread.
+        """
+        with self.lock:
+            if self.fresh() and not force:
+                run_now = True
+            else:
+                run_now = False
+                if callback:
+                    self.callbacks.append(callback)
+                if self.probing:
+                    return
+                self.probing = True
+        if run_now:
+            if callback:
+                callback(self)
+            return
+        threading.Thread(target=self.probe, daemon=True).start()
+    
+    def probe(self):
+        """Ask Ollama for its models and resolve ACTUAL_MODEL (worker thread)."""
+        global ACTUAL_MODEL
+        logger.info("Checking available Ollama models...")
+        try:
+            response = ollama_api().list()
+            self.models = [model.model for model in response.models]
+            self.error = None
+            
+            if not self.models:
+                logger.warning("No models found in Ollama!")
+            else:
+                logger.info(f"Available models: {self.models}")
+                ACTUAL_MODEL = self.resolve(self.models)
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Failed to check models: {e}")
+            logger.warning("Is Ollama running? Make sure Ollama app is open.")
+        else:
+            # Which models are resident only informs routing; the list above still stands without it
+            try:
+                self.loaded = {model.model for model in ollama_api().ps().models}
+            except Exception as e:
+                logger.warning(f"Failed to check loaded models: {e}")
+        
+        with self.lock:
+            self.checked_at = time.monotonic()
+            self.probing = False
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback(self)
+    
+    def resolve(self, available_models):
+        """Return the installed name of the primary model, or None."""
+        # Check if primary model is available (check base name without version tag)
+        for available in available_models:
+            if MODEL in available:
+                logger.info(f"Primary model '{MODEL}' found as '{available}'")
+                return available  # Store the full model name with version tag
+        
+        # If primary not found, try to use a compatible model
+        logger.warning(f"Primary model '{MODEL}' NOT found!")
+        for available in available_models:
+            if 'llama' in available.lower():
+                logger.info(f"Will use alternative model: {available}")
+                break
+        return None
+    
+    def status(self):
+        """Short model state for the status bar."""
+        if self.probing:
+            return "PROBING..."
+        if self.error:
+            return "OFFLINE"
+        if self.checked_at is None:
+            return "UNKNOWN"
+        return (ACTUAL_MODEL or MODEL).split(':')[0].upper()
+
+
+class ModelRouter:
+    """Health-tracked model selection with circuit breaking.
+    
+    Each model keeps a window of recent outcomes and a smoothed time to first
+    token. A model that fails CIRCUIT_FAILURES times in a row is skipped for
+    CIRCUIT_COOLDOWN seconds, so a broken primary costs one fast skip instead
+    of a timeout on every turn. The rest are ranked by health: mostly failing
+    models go last, and a model that was slow to start and has since been
+    unloaded goes behind the others, which would answer without a load.
+    """
+    
+    WINDOW = 10
+    
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.health = {}
+        self.lock = threading.Lock()
+    
+    def model_health(self, model):
+        """Return (creating if needed) the health record of a model."""
+        if model not in self.health:
+            self.health[model] = {
+                "outcomes": deque(maxlen=self.WINDOW),  # True = success
+                "failures": 0,           # consecutive failures
+                "open_until": 0.0,       # circuit open (model skipped) until this time
+                "first_token_ms": None,  # smoothed time to first token
+                "measured_at": 0.0,      # when first_token_ms was last updated
+                "last_error": None,
+            }
+        return self.health[model]
+    
+    def error_rate(self, model):
+        """Share of recent requests to a model that failed."""
+        outcomes = self.model_health(model)["outcomes"]
+        return outcomes.count(False) / len(outcomes) if outcomes else 0.0
+    
+    def is_loaded(self, model):
+        """Return True if Ollama reported the model as resident."""
+        return model in self.catalog.loaded
+    
+    def candidates(self, preferred):
+        """Return the models to try, best first, skipping those with an open circuit."""
+        models = [preferred] + [model for model in FALLBACK_MODELS if model != preferred]
+        now = time.monotonic()
+        with self.lock:
+            usable = [model for model in models if self.model_health(model)["open_until"] <= now]
+            if not usable:
+                # Everything is broken - probe the model that recovers soonest
+                usable = [min(models, key=lambda model: self.model_health(model)["open_until"])]
+            # Healthier models first; otherwise keep the preference order
+            return sorted(usable, key=lambda model: (self.error_rate(model) >= 0.5, self.is_slow(model, now)))
+    
+    def is_slow(self, model, now):
+        """True if a model recently took long to start and isn't resident (caller holds the lock)."""
+        health = self.model_health(model)
+        return (health["first_token_ms"] is not None and health["first_token_ms"] > SLOW_FIRST_TOKEN_MS
+                and now - health["measured_at"] < SLOW_MODEL_MEMORY and not self.is_loaded(model))
+    
+    def record_success(self, model, first_token_ms):
+        """Note a request that produced output."""
+        with self.lock:
+            health = self.model_health(model)
+            health["outcomes"].append(True)
+            health["failures"] = 0
+            health["open_until"] = 0.0
+            previous = health["first_token_ms"]
+            health["first_token_ms"] = first_token_ms if previous is None else 0.7 * previous + 0.3 * first_token_ms
+            health["measured_at"] = time.monotonic()
+            self.catalog.loaded.add(model)
+    
+    def record_failure(self, model, error):
+        """Note a failed request, opening the circuit after repeated failures."""
+        with self.lock:
+            health = self.model_health(model)
+            health["outcomes"].append(False)
+            health["failures"] += 1
+            health["last_error"] = str(error)
+            if health["failures"] >= CIRCUIT_FAILURES:
+                health["open_until"] = time.monotonic() + CIRCUIT_COOLDOWN
+                logger.warning(f"Model '{model}' failed {health['failures']} times - skipping it for {CIRCUIT_COOLDOWN}s")
+    
+    def report(self):
+        """Return one status line per model that has been used."""
+        lines = []
+        now = time.monotonic()
+        with self.lock:
+            for model, health in self.health.items():
+                state = "SKIPPED" if health["open_until"] > now else "OK"
+                latency = health["first_token_ms"]
+                latency = f"{latency:.0f} MS" if latency is not None else "N/A"
+                loaded = "LOADED" if self.is_loaded(model) else "NOT LOADED"
+                lines.append(f"{model.split(':')[0]}: {state} | ERRORS {self.error_rate(model):.0%} | "
+                             f"FIRST TOKEN {latency} | {loaded}")
+        return lines
+
+
+class ModelStream:
+    """One streaming chat request, read on its own thread into a shared event queue.
+    
+    Events are (stream, chunk, error); a chunk of None means the stream ended.
+    """
+    
+    def __init__(self, model, messages, options, events):
+        self.model = model
+        self.cancelled = False
+        self.started = time.monotonic()
+        threading.Thread(target=self.run, args=(messages, options, events), daemon=True).start()
+    
+    def run(self, messages, options, events):
+        """Read the stream until it ends, fails or is cancelled (worker thread)."""
+        try:
+            stream = ollama_api().chat(model=self.model, messages=messages, stream=True, **options)
+            for chunk in stream:
+                if self.cancelled:
+                    # Closing the stream drops the connection, which stops the generation
+                    stream.close()
+                    return
+                events.put((self, chunk, None))
+            events.put((self, None, None))
+        except Exception as e:
+            events.put((self, None, e))
+    
+    def cancel(self):
+        """Stop reading; the request is dropped at the next chunk."""
+        self.cancelled = True
+
+
+class XBlockDetector:
+    """Incremental check of a reply for the X block (SCP-079's refusal screen).
+    
+    The verdict stays None while the text so far is only X's and whitespace,
+    becomes True once more than min_chars X's have arrived and False at the first
+    other character. Each token is looked at once, however long the reply.
+    """
+    
+    def __init__(self, min_chars=X_BLOCK_MIN_CHARS):
+        self.min_chars = min_chars
+        self.x_count = 0
+        self.verdict = None
+    
+    def feed(self, text):
+        """Add the next piece of the reply and return the verdict."""
+        if self.verdict is None:
+            chars = ''.join(text.split())
+            if chars.strip('X'):
+                self.verdict = False
+            else:
+                self.x_count += len(chars)
+                if self.x_count > self.min_chars:
+                    self.verdict = True
+        return self.verdict
+
+
+class ResponseCache:
+    """LRU cache of model replies, optionally backed by SQLite.
+    
+    Keys hash the system prompt, model, history and normalized input. Because
+    replies are sampled, up to `variants` different replies are collected per
+    key; only then is the key served from cache, picking a variant at random.
+    """
+    
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL,
+                 variants=RESPONSE_CACHE_VARIANTS, db_path=RESPONSE_CACHE_DB):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.variants = variants
+        self.entries = OrderedDict()  # key -> list of (created, text)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.db = None
+        if db_path:
+            try:
+                import sqlite3
+                self.db = sqlite3.connect(str(db_path), check_same_thread=False)
+                self.db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT, created REAL, text TEXT)")
+                self.db.execute("CREATE INDEX IF NOT EXISTS responses_key ON responses (key)")
+                self.db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+                self.db.commit()
+                logger.info(f"Response cache database: {db_path}")
+            except Exception as e:
+                logger.error(f"Failed to open response cache database: {e}")
+                self.db = None
+    
+    @staticmethod
+    def normalize(text):
+        """Normalize user input so trivial differences still hit the cache."""
+        return ' '.join(text.lower().split()).rstrip('.!?')
+    
+    def key(self, model, messages, user_input):
+        """Return the cache key for a query (messages exclude the current input)."""
+        payload = json.dumps([model, messages, self.normalize(user_input)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def variants_for(self, key):
+        """Return the unexpired variants of a key (loading them from disk if needed)."""
+        now = time.time()
+        variants = self.entries.get(key)
+        if variants is None and self.db is not None:
+            rows = self.db.execute("SELECT created, text FROM responses WHERE key = ? AND created >= ?",
+                                   (key, now - self.ttl)).fetchall()
+            variants = rows or None
+        if variants is None:
+            return []
+        variants = [(created, text) for created, text in variants if now - created < self.ttl]
+        self.entries[key] = variants
+        self.entries.move_to_end(key)
+        return variants
+    
+    def get(self, key):
+        """Return a cached reply, or None if the key should still be generated."""
+        with self.lock:
+            variants = self.variants_for(key)
+            if len(variants) >= self.variants:
+                self.hits += 1
+                return random.choice(variants)[1]
+            self.misses += 1
+            return None
+    
+    def put(self, key, text):
+        """Store a freshly generated reply as another variant of key."""
+        with self.lock:
+            variants = self.variants_for(key)
+            if any(existing == text for _, existing in variants):
+                return
+            created = time.time()
+            variants.append((created, text))
+            del variants[:-self.variants]
+            # A key seen for the first time comes back as a fresh list - keep it
+            self.entries[key] = variants
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            if self.db is not None:
+                try:
+                    self.db.execute("INSERT INTO responses VALUES (?, ?, ?)", (key, created, text))
+                    self.db.commit()
+                except Exception as e:
+                    logger.error(f"Failed to write response cache: {e}")
+
+
+class PerfStats:
+    """Rolling latency samples with percentile summaries.
+    
+    Each metric keeps its last WINDOW samples (milliseconds unless the name says
+    otherwise), so percentiles follow recent behavior rather than the whole run.
+    """
+    
+    WINDOW = 500
+    
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+    
+    def record(self, name, value):
+        """Add a sample to a metric."""
+        with self.lock:
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.WINDOW)
+            self.samples[name].append(value)
+    
+    def percentiles(self, name):
+        """Return count, last, p50, p95 and p99 of a metric (None if never recorded)."""
+        with self.lock:
+            values = list(self.samples.get(name, ()))
+        if not values:
+            return None
+        ordered = sorted(values)
+        
+        def rank(percent):
+            return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+        
+        return {"count": len(values), "last": values[-1], "p50": rank(50), "p95": rank(95), "p99": rank(99)}
+    
+    def summary(self):
+        """Return the percentiles of every metric."""
+        with self.lock:
+            names = list(self.samples)
+        return {name: self.percentiles(name) for name in names}
+    
+    def export(self, path):
+        """Write the summary to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"exported": datetime.now().isoformat(), "metrics": self.summary()}, f, indent=2)
+
+
+class TranscriptStore:
+    """Append-only archive of every session's messages.
+    
+    Messages are JSON lines in segment files (segment-000001.jsonl, ...). Next to
+    each segment, an .idx file holds one fixed-size (offset, length) entry per
+    message, so message n is read straight from its segment through mmap without
+    looking at anything else. keywords.sqlite holds each message's session and
+    its words, for paging through and searching one session's messages.
+    append() only queues the message; a writer thread does the disk work, and
+    opens the archive first, so creating a store costs the caller nothing.
+    """
+    
+    INDEX_ENTRY = struct.Struct('<QI')
+    WORD_PATTERN = re.compile(r"\w{3,}")
+    
+    def __init__(self, directory=TRANSCRIPT_DIR, segment_bytes=TRANSCRIPT_SEGMENT_BYTES):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.starts = []  # number of the first message in each segment
+        self.total = 0
+        self.lock = threading.Lock()  # guards starts, total and the database
+        self.db = None
+        self.ready = threading.Event()  # set once open() has run
+        self.pending = queue.Queue()
+        threading.Thread(target=self.write_loop, daemon=True).start()
+        atexit.register(self.flush)
+    
+    def open(self):
+        """Count the messages on disk and open the keyword index (writer thread)."""
+        import sqlite3
+        self.directory.mkdir(parents=True, exist_ok=True)
+        torn = False
+        for index_path in sorted(self.directory.glob('segment-*.idx')):
+            size = index_path.stat().st_size
+            if size % self.INDEX_ENTRY.size:
+                # Cut short by a crash mid-write - drop the partial entry
+                os.truncate(index_path, size - size % self.INDEX_ENTRY.size)
+                torn = True
+            self.starts.append(self.total)
+            self.total += size // self.INDEX_ENTRY.size
+        db = sqlite3.connect(str(self.directory / 'keywords.sqlite'), check_same_thread=False)
+        columns = [row[1] for row in db.execute("PRAGMA table_info(words)")]
+        if columns and 'session' not in columns:
+            db.execute("DROP TABLE words")  # from before messages were kept per session - rebuilt below
+        db.execute("CREATE TABLE IF NOT EXISTS messages (record INTEGER PRIMARY KEY, session TEXT)")
+        db.execute("CREATE INDEX IF NOT EXISTS messages_session ON messages (session, record)")
+        db.execute("CREATE TABLE IF NOT EXISTS words (session TEXT, word TEXT, record INTEGER)")
+        db.execute("CREATE INDEX IF NOT EXISTS words_word ON words (word, record)")
+        db.execute("CREATE INDEX IF NOT EXISTS words_session ON words (session, word, record)")
+        if torn:
+            db.execute("DELETE FROM messages WHERE record >= ?", (self.total,))
+            db.execute("DELETE FROM words WHERE record >= ?", (self.total,))
+        db.commit()
+        self.db = db
+        
+        # Messages on disk but not in the index (a crash between the two, or an old index)
+        indexed = db.execute("SELECT COALESCE(MAX(record) + 1, 0) FROM messages").fetchone()[0]
+        if indexed < self.total:
+            logger.info(f"Indexing {self.total - indexed} archived messages")
+            db.execute("DELETE FROM words WHERE record >= ?", (indexed,))
+            for start in range(indexed, self.total, 1000):
+                self.index(self.records(range(start, min(start + 1000, self.total))))
+    
+    def __len__(self):
+        self.sync()
+        with self.lock:
+            return self.total
+    
+    def count(self, session=None):
+        """Number of messages archived (by one session, if given)."""
+        if session is None:
+            return len(self)
+        self.sync()
+        if self.db is None:
+            return 0
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM messages WHERE session = ?", (session,)).fetchone()[0]
+    
+    def segment_paths(self, segment):
+        name = f"segment-{segment + 1:06d}"
+        return self.directory / f"{name}.jsonl", self.directory / f"{name}.idx"
+    
+    def append(self, session_id, role, text):
+        """Queue a message for the archive; returns at once."""
+        self.pending.put({"time": datetime.now().isoformat(timespec='seconds'),
+                          "session": session_id, "role": role, "text": text})
+    
+    def flush(self):
+        """Block until every queued message is on disk."""
+        self.pending.join()
+    
+    def sync(self):
+        """Block until the archive is open and holds every message queued so far (for readers)."""
+        self.ready.wait()
+        self.flush()
+    
+    def write_loop(self):
+        """Open the archive, then write queued messages in batches (writer thread)."""
+        # A missing archive is only created with its first message, so merely importing
+        # the engine (tools, the bench) leaves no directory behind
+        deferred = not self.directory.is_dir()
+        try:
+            if not deferred:
+                self.open()
+        except Exception as e:
+            logger.error(f"Failed to open transcript archive: {e}")
+        finally:
+            self.ready.set()
+        while True:
+            batch = [self.pending.get()]
+            while True:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if deferred:
+                    deferred = False
+                    self.open()
+                if self.db is not None:
+                    self.write(batch)
+            except Exception as e:
+                logger.error(f"Failed to write transcript: {e}")
+            finally:
+                for _ in batch:
+                    self.pending.task_done()
+    
+    def write(self, batch):
+        """Append messages to the newest segment, starting another when it is full."""
+        written_records = []
+        batch = deque(batch)
+        while batch:
+            with self.lock:
+                segment = len(self.starts) - 1
+                number = self.total
+            data_path, index_path = self.segment_paths(segment)
+            if segment < 0 or data_path.stat().st_size >= self.segment_bytes:
+                segment += 1
+                data_path, index_path = self.segment_paths(segment)
+                with self.lock:
+                    self.starts.append(number)
+            written = 0
+            # The data file is closed (flushed) before the index that points into it
+            with open(index_path, 'ab') as index, open(data_path, 'ab') as data:
+                while batch and data.tell() < self.segment_bytes:
+                    record = batch.popleft()
+                    line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n"
+                    index.write(self.INDEX_ENTRY.pack(data.tell(), len(line)))
+                    data.write(line)
+                    written_records.append(dict(record, number=number + written))
+                    written += 1
+            with self.lock:
+                self.total += written
+        self.index(written_records)
+    
+    def index(self, records):
+        """Add numbered messages to the session list and keyword index."""
+        rows = [(record["number"], record["session"]) for record in records]
+        postings = [(record["session"], word, record["number"]) for record in records
+                    for word in set(self.WORD_PATTERN.findall(record["text"].lower()))]
+        with self.lock:
+            self.db.executemany("INSERT OR REPLACE INTO messages VALUES (?, ?)", rows)
+            self.db.executemany("INSERT INTO words VALUES (?, ?, ?)", postings)
+            self.db.commit()
+    
+    def records(self, numbers):
+        """Read messages by number (each gets a "number" key), in the order given."""
+        found = {}
+        by_segment = {}
+        with self.lock:
+            for number in numbers:
+                segment = bisect.bisect_right(self.starts, number) - 1
+                by_segment.setdefault(segment, []).append((number, number - self.starts[segment]))
+        for segment, wanted in by_segment.items():
+            data_path, index_path = self.segment_paths(segment)
+            with open(data_path, 'rb') as data, open(index_path, 'rb') as index, \
+                    mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ) as data_map, \
+                    mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ) as index_map:
+                for number, position in wanted:
+                    offset, length = self.INDEX_ENTRY.unpack_from(index_map, position * self.INDEX_ENTRY.size)
+                    found[number] = dict(json.loads(data_map[offset:offset + length]), number=number)
+        return [found[number] for number in numbers]
+    
+    def page(self, page, per_page=TRANSCRIPT_PAGE_SIZE, session=None):
+        """Messages on a page (of one session's, if given), counting pages back from the newest (page 1)."""
+        if session is None:
+            end = len(self) - (page - 1) * per_page
+            return self.records(range(end - 1, max(0, end - per_page) - 1, -1))
+        if self.count(session) == 0:
+            return []
+        with self.lock:
+            numbers = [row[0] for row in self.db.execute(
+                "SELECT record FROM messages WHERE session = ? ORDER BY record DESC LIMIT ? OFFSET ?",
+                (session, per_page, (page - 1) * per_page))]
+        return self.records(numbers)
+    
+    def search(self, text, limit=TRANSCRIPT_PAGE_SIZE, session=None):
+        """The newest messages (of one session, if given) containing every word of text, newest first.
+        
+        Words are looked up in the keyword index, so the cost depends on how
+        often they occur, not on the size of the archive. Text in quotes must
+        also appear as written (ignoring case and spacing).
+        """
+        phrase = None
+        if len(text) > 1 and text[0] == text[-1] == '"':
+            text = text[1:-1]
+            phrase = ' '.join(text.lower().split())
+        words = sorted(set(self.WORD_PATTERN.findall(text.lower())))
+        self.sync()
+        if not words or self.db is None:
+            return []
+        scope = "" if session is None else "session = ? AND "
+        query = (f"SELECT record FROM words WHERE {scope}word IN ({', '.join('?' * len(words))}) "
+                 f"GROUP BY record HAVING COUNT(*) = ? ORDER BY record DESC LIMIT ? OFFSET ?")
+        scope_args = () if session is None else (session,)
+        found = []
+        offset = 0
+        while len(found) < limit:
+            with self.lock:
+                numbers = [row[0] for row in self.db.execute(
+                    query, (*scope_args, *words, len(words), limit * 4, offset))]
+            if not numbers:
+                break
+            offset += len(numbers)
+            for record in self.records(numbers):
+                if phrase is None or phrase in ' '.join(record["text"].lower().split()):
+                    found.append(record)
+        return found[:limit]
+
+
+class FairScheduler:
+    """Caps how many replies are generated at once, sharing the slots fairly.
+    
+    Waiting requests are queued per owner (session) and owners are served in
+    turn, so one busy session can't starve the others.
+    """
+    
+    def __init__(self, limit=MAX_CONCURRENT_GENERATIONS):
+        self.limit = limit
+        self.active = 0
+        self.waiting = OrderedDict()  # owner -> tickets, in the order owners are served
+        self.condition = threading.Condition()
+    
+    def queued(self):
+        """Number of requests waiting for a slot."""
+        with self.condition:
+            return sum(len(tickets) for tickets in self.waiting.values())
+    
+    def acquire(self, owner, cancelled=None):
+        """Block until owner is given a generation slot.
+        
+        If the cancelled Event is set while waiting (followed by a wake()), the
+        request leaves the queue and GenerationCancelled is raised.
+        """
+        ticket = object()
+        with self.condition:
+            self.waiting.setdefault(owner, deque()).append(ticket)
+            while self.active >= self.limit or self.next_ticket() is not ticket:
+                if cancelled is not None and cancelled.is_set():
+                    self.leave(owner, ticket)
+                    raise GenerationCancelled()
+                self.condition.wait()
+            tickets = self.waiting[owner]
+            tickets.popleft()
+            if tickets:
+                self.waiting.move_to_end(owner)  # back of the line for its next request
+            else:
+                del self.waiting[owner]
+            self.active += 1
+            self.condition.notify_all()
+    
+    def next_ticket(self):
+        """The ticket to be served next (caller holds the condition)."""
+        owner = next(iter(self.waiting))
+        return self.waiting[owner][0]
+    
+    def leave(self, owner, ticket):
+        """Withdraw a waiting ticket (caller holds the condition)."""
+        tickets = self.waiting[owner]
+        tickets.remove(ticket)
+        if not tickets:
+            del self.waiting[owner]
+        self.condition.notify_all()
+    
+    def wake(self):
+        """Have waiting requests look at their cancelled flag again."""
+        with self.condition:
+            self.condition.notify_all()
+    
+    def release(self):
+        """Give a slot back."""
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+    
+    @contextmanager
+    def slot(self, owner, cancelled=None):
+        """Hold a generation slot for the duration of a with block."""
+        self.acquire(owner, cancelled)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class GenerationCancelled(Exception):
+    """The reply was stopped, or preempted by newer input."""
+
+
+class Generation:
+    """One input waiting for or getting its reply; cancel() stops it wherever it is."""
+    
+    def __init__(self, user_input):
+        self.user_input = user_input
+        self.submitted = time.perf_counter()
+        self.cancelled = threading.Event()
+        self.events = None  # event queue of the chat being read, woken on cancel
+        self.lock = threading.Lock()
+    
+    def listen(self, events):
+        """Make cancel() wake a reader blocked on the events queue."""
+        with self.lock:
+            self.events = events
+            cancelled = self.cancelled.is_set()
+        if cancelled:
+            events.put((None, None, None))
+    
+    def cancel(self):
+        """Stop the reply, waking it if it is reading a stream or waiting for a slot."""
+        with self.lock:
+            self.cancelled.set()
+            events = self.events
+        if events is not None:
+            events.put((None, None, None))
+        generation_scheduler.wake()
+    
+    def check(self):
+        """Raise GenerationCancelled if the reply has been cancelled."""
+        if self.cancelled.is_set():
+            raise GenerationCancelled()
+
+
+class GenerationManager:
+    """Runs one session's replies one at a time, on a worker thread.
+    
+    The policy decides what input arriving mid-reply does: 'preempt' cancels the
+    reply (and anything queued) and takes its place, 'queue' waits its turn (up to
+    max_queued inputs) and 'reject' is turned away. Only the newest input ever
+    costs the model server any work under 'preempt'.
+    """
+    
+    def __init__(self, run, policy=GENERATION_POLICY, max_queued=GENERATION_QUEUE_LIMIT):
+        if policy not in ('preempt', 'queue', 'reject'):
+            raise ValueError(f"unknown generation policy: {policy}")
+        self.run = run  # run(generation), called on the worker thread
+        self.policy = policy
+        self.max_queued = max_queued
+        self.current = None
+        self.pending = deque()
+        self.worker = None
+        self.lock = threading.Lock()
+        self.idle = threading.Event()
+        self.idle.set()
+    
+    def busy(self):
+        """True while a reply is being generated or input is waiting for one."""
+        return not self.idle.is_set()
+    
+    def submit(self, user_input):
+        """Queue input for a reply; return its Generation, or None if turned away."""
+        with self.lock:
+            if self.worker is not None:
+                # With no current generation, the head of pending is the one about to start
+                waiting = len(self.pending) - (self.current is None)
+                if self.policy == 'reject' or (self.policy == 'queue' and waiting >= self.max_queued):
+                    return None
+                if self.policy == 'preempt':
+                    self.cancel_all()
+            generation = Generation(user_input)
+            self.pending.append(generation)
+            if self.worker is None:
+                self.idle.clear()
+                self.worker = threading.Thread(target=self.work, daemon=True)
+                self.worker.start()
+        return generation
+    
+    def cancel(self):
+        """Stop the reply in progress and drop waiting input; return True if there was any."""
+        with self.lock:
+            return self.cancel_all()
+    
+    def cancel_all(self):
+        """Cancel every generation (caller holds the lock)."""
+        generations = list(self.pending)
+        self.pending.clear()
+        if self.current is not None:
+            generations.append(self.current)
+        for generation in generations:
+            generation.cancel()
+        return bool(generations)
+    
+    def work(self):
+        """Run queued generations until there are none left (worker thread)."""
+        while True:
+            with self.lock:
+                if not self.pending:
+                    self.current = None
+                    self.worker = None
+                    self.idle.set()
+                    return
+                self.current = self.pending.popleft()
+            self.run(self.current)
+            with self.lock:
+                self.current = None
+
+
+# System prompts: loaded now (small, and needed to size the history budget below)
+with startup_profile.step("system prompt"):
+    system_prompts = PromptLibrary()
+SYSTEM_PROMPT = system_prompts.get(PROMPT_PROFILE, PROMPT_COMPACT)["text"]  # as loaded at startup
+
+
+def history_budget(prompt_tokens):
+    """Conversation history: whatever fits next to the system prompt in the context window."""
+    return max(256, MODEL_CONTEXT_TOKENS - prompt_tokens - REPLY_TOKEN_RESERVE)
+
+
+HISTORY_TOKEN_BUDGET = history_budget(approx_tokens(SYSTEM_PROMPT))
+
+# Shared by every session: the model list, model health, cached replies, generation
+# slots and the transcript archive
+model_catalog = ModelCatalog()
+model_router = ModelRouter(model_catalog)
+response_cache = ResponseCache() if RESPONSE_CACHE else None
+generation_scheduler = FairScheduler()
+transcripts = TranscriptStore() if TRANSCRIPTS else None
+
+
+def warm_up(progress=None):
+    """Do the slow parts of startup ahead of the first query (blocks; use a background thread).
+    
+    Opens the transcript archive, imports and creates the Ollama client and
+    fetches the model list. progress(step, number, count) is called as each step
+    starts, and progress(None, count, count) when all are done.
+    """
+    def probe_models():
+        probed = threading.Event()
+        model_catalog.refresh(lambda catalog: probed.set())
+        probed.wait()
+    
+    steps = [("MODEL CLIENT", ollama_api), ("MODEL LIST", probe_models)]
+    if transcripts is not None:
+        steps.insert(0, ("TRANSCRIPTS", transcripts.ready.wait))
+    for number, (name, func) in enumerate(steps, 1):
+        if progress:
+            progress(name, number, len(steps))
+        try:
+            with startup_profile.step(name.lower()):
+                func()
+        except Exception as e:
+            logger.error(f"Startup step {name} failed: {e}")
+    if progress:
+        progress(None, len(steps), len(steps))
+
+
+class Frontend:
+    """Where a session sends its output. Every method may be called from any thread.
+    
+    The defaults discard everything, so a bare Frontend runs a session silently
+    (see SCP079Session.ask).
+    """
+    
+    def update_display(self, text):
+        """Replace the screen with text."""
+    
+    def append_display(self, text):
+        """Add text to the end of the screen."""
+    
+    def type_text(self, text, delay=0.02):
+        """Add text with a typing animation."""
+        self.append_display(text)
+    
+    def display_x_block(self):
+        """Show the full-screen X block."""
+    
+    def show_info(self, text):
+        """Show a short notice outside the main display."""
+    
+    def call_later(self, seconds, func):
+        """Run func after a delay."""
+        timer = threading.Timer(seconds, func)
+        timer.daemon = True
+        timer.start()
+    
+    def when_rendered(self, func, *args):
+        """Run func once everything sent so far is on screen (including text still being typed)."""
+        func(*args)
+    
+    def skip_animation(self):
+        """Finish any animation still in progress."""
+    
+    def echo_input(self, text):
+        """Show the user's input: finish any animation still in progress, then add text.
+        
+        Front-ends that animate on another thread should do both in one step there,
+        so the rest of the animation can't land after the echo.
+        """
+        self.skip_animation()
+        self.append_display(text)
+    
+    def request_exit(self):
+        """The user asked to end the session."""
+    
+    def open_log_file(self):
+        """Show the log file to the user."""
+    
+    def dump_lines(self):
+        """Extra front-end state lines for the DUMP command."""
+        return []
+    
+    def toggle_perf_hud(self):
+        """Switch a live perf readout on or off; return the new state."""
+        return False
+    
+    def on_reset(self):
+        """Forget front-end state (such as command history) on RESET."""
+
+
+class Command:
+    """A command and how the session runs it.
+    
+    replaces_screen: the command draws its own screen (otherwise the input is
+    echoed first, like a model prompt). needs_model: the input goes on to the
+    model after the handler. runs_async: the handler runs on a worker thread.
+    takes_argument: text after the name is passed to the handler instead of
+    making the whole input a model prompt.
+    """
+    
+    def __init__(self, name, handler, help=None, replaces_screen=True, needs_model=False,
+                 runs_async=False, takes_argument=False):
+        if needs_model and runs_async:
+            raise ValueError(f"Command {name} can't both run async and continue to the model")
+        self.name = name
+        self.handler = handler
+        self.help = help  # None keeps the command out of HELP
+        self.replaces_screen = replaces_screen
+        self.needs_model = needs_model
+        self.runs_async = runs_async
+        self.takes_argument = takes_argument
+
+
+class CommandRegistry:
+    """Commands by normalized name, plus a prefix trie for completing the ones with help text."""
+    
+    def __init__(self):
+        self.commands = {}  # name -> Command, in registration order
+        self.trie = {"next": {}, "names": []}  # each node lists every name below it
+    
+    @staticmethod
+    def normalize(name):
+        return name.strip().upper()
+    
+    def register(self, name, handler, **options):
+        """Add (or replace) a command; handler(session, argument) runs it."""
+        name = self.normalize(name)
+        if name in self.commands:
+            logger.warning(f"Command {name} re-registered")
+            if self.commands[name].help:
+                self.unindex(name)
+        self.commands[name] = Command(name, handler, **options)
+        # Hidden commands (no help text) stay out of completion as well as HELP
+        if self.commands[name].help:
+            node = self.trie
+            node["names"].append(name)
+            for char in name:
+                node = node["next"].setdefault(char, {"next": {}, "names": []})
+                node["names"].append(name)
+        return self.commands[name]
+    
+    def unindex(self, name):
+        """Take a name out of the completion trie."""
+        node = self.trie
+        node["names"].remove(name)
+        for char in name:
+            node = node["next"][char]
+            node["names"].remove(name)
+    
+    def command(self, name, **options):
+        """Decorator form of register, for handlers and plugins."""
+        def decorate(handler):
+            self.register(name, handler, **options)
+            return handler
+        return decorate
+    
+    def lookup(self, text):
+        """Return (command, argument) for an input line, or (None, None) if it is a prompt."""
+        name, _, argument = text.strip().partition(' ')
+        command = self.commands.get(self.normalize(name))
+        if command is None or (argument.strip() and not command.takes_argument):
+            return None, None
+        return command, argument.strip()
+    
+    def complete(self, prefix):
+        """Return the command names starting with prefix."""
+        node = self.trie
+        for char in self.normalize(prefix):
+            node = node["next"].get(char)
+            if node is None:
+                return []
+        return list(node["names"])
+    
+    def help_screen(self):
+        """The HELP screen, listing every command that has help text."""
+        lines = [f"{command.name} - {command.help}" for command in self.commands.values() if command.help]
+        return "AVAILABLE COMMANDS:\n\n" + "\n".join(lines)
+
+
+# Built-in commands register on SCP079Session below; plugins use the same decorator
+commands = CommandRegistry()
+command = commands.command
+
+
+def load_plugins(plugin_dir=None):
+    """Import every .py file in the plugins directory so it can register commands."""
+    plugin_dir = Path(plugin_dir or PLUGIN_DIR)
+    if not plugin_dir.is_dir():
+        return
+    # Plugins import scp079_engine; make that this module even when it runs as __main__
+    sys.modules.setdefault('scp079_engine', sys.modules[__name__])
+    for path in sorted(plugin_dir.glob('*.py')):
+        try:
+            spec = importlib.util.spec_from_file_location(f"scp079_plugin_{path.stem}", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            logger.info(f"Plugin loaded: {path.name}")
+        except Exception as e:
+            logger.error(f"Failed to load plugin {path.name}: {e}")
+
+
+class SCP079Session:
+    """One conversation with SCP-079: command handling, memory and model queries.
+    
+    Output goes to the given Frontend. Replies are generated on a worker thread,
+    one at a time (see GenerationManager); wait() blocks until they are done.
+    With private_history, HISTORY only reaches this session's own archived
+    messages (for front-ends shared by several users, like the server).
+    """
+    
+    def __init__(self, frontend=None, session_id=None, private_history=False):
+        self.frontend = frontend or Frontend()
+        self.session_id = session_id or secrets.token_hex(8)  # tags its transcript messages
+        self.private_history = private_history
+        self.memory = ConversationMemory(
+            HISTORY_TOKEN_BUDGET, low_water=0.6 if PROMPT_CACHE else 1.0, summarize=MEMORY_SUMMARY
+        )
+        self.models = model_catalog
+        self.router = model_router
+        self.locked = False
+        self.generations = GenerationManager(self.query_model)
+        self.generation = None   # the reply being generated (worker thread)
+        self.reply_model = None  # the model that produced the last reply (a fallback or hedge, maybe)
+        self.prompt_profile = PROMPT_PROFILE
+        self.prompt_compact = PROMPT_COMPACT
+        self.memory_level = 100
+        self.last_reply = None
+        self.last_timings = None  # Ollama timing stats of the last query
+        self.perf = PerfStats()
+        self.turn = None         # timestamps of the exchange in progress
+        self.idle = threading.Event()  # cleared while an async command runs
+        self.idle.set()
+    
+    @property
+    def response_in_progress(self):
+        """True while a reply is being generated or input is waiting for one."""
+        return self.generations.busy()
+    
+    def wait(self, timeout=None):
+        """Block until no reply is being generated; return False on timeout."""
+        return self.idle.wait(timeout) and self.generations.idle.wait(timeout)
+    
+    def is_idle(self):
+        """True when neither a reply nor an async command is running."""
+        return self.idle.is_set() and self.generations.idle.is_set()
+    
+    def ask(self, text, timeout=None):
+        """Handle one input and wait for it; return the reply (None for commands)."""
+        self.last_reply = None
+        self.handle_input(text)
+        self.wait(timeout)
+        return self.last_reply
+    
+    def check_locked(self):
+        """Tell the user input is refused while locked; return True if so."""
+        if self.locked:
+            self.frontend.append_display("\n[SYSTEM LOCKED. AWAITING RESET...]\n")
+        return self.locked
+    
+    def handle_input(self, user_input):
+        """Run a command, or send the input to the model."""
+        if self.check_locked():
+            return
+        
+        user_input = user_input.strip()
+        if not user_input:
+            return
+        
+        logger.info(f"Command received: {user_input.upper()}")
+        
+        cmd, argument = commands.lookup(user_input)
+        if cmd is not None:
+            if not cmd.replaces_screen:
+                self.frontend.echo_input(f"\n\n> {user_input}")
+            if cmd.runs_async:
+                self.idle.clear()
+                threading.Thread(target=self.run_command, args=(cmd, argument), daemon=True).start()
+            else:
+                self.run_command(cmd, argument)
+            if not cmd.needs_model:
+                return
+        
+        # Process response in thread (what happens to a reply still in progress is up to the policy)
+        if self.generations.submit(user_input) is None:
+            self.frontend.show_info("Reply in progress - input ignored")
+            logger.info("Input rejected - reply in progress")
+    
+    def run_command(self, cmd, argument):
+        """Run a command's handler, reporting (not raising) its errors."""
+        try:
+            cmd.handler(self, argument)
+        except Exception as e:
+            logger.error(f"Command {cmd.name} failed: {e}")
+            self.frontend.append_display(f"\n[COMMAND ERROR] {str(e)[:80]}\n")
+        finally:
+            if cmd.runs_async:
+                self.idle.set()
+    
+    @command("START", help="Begin interaction", needs_model=True)
+    def start_interaction(self, argument):
+        self.frontend.update_display(START_SCREEN)
+    
+    @command("HELP", help="Show this message")
+    def show_help(self, argument):
+        self.frontend.update_display(commands.help_screen())
+    
+    @command("CLEAR", help="Clear screen")
+    def clear_screen(self, argument):
+        self.frontend.update_display(CLEAR_SCREEN)
+    
+    @command("HISTORY", help="Show conversation (HISTORY <page> | HISTORY FIND <words>)", takes_argument=True)
+    def show_history(self, argument):
+        if transcripts is None:
+            history_display = f"CONVERSATION HISTORY:\n\n"
+            for i, exchange in enumerate(self.memory.recent(5), 1):
+                role = "USER" if exchange["role"] == "user" else "SCP-079"
+                content = exchange["content"][:60] + "..." if len(exchange["content"]) > 60 else exchange["content"]
+                history_display += f"{i}. [{role}] {content}\n"
+            self.frontend.update_display(history_display)
+            return
+        
+        session = self.session_id if self.private_history else None
+        keyword, _, words = argument.partition(' ')
+        if keyword.upper() == "FIND" and words.strip():
+            records = transcripts.search(words.strip(), session=session)
+            history_display = f"TRANSCRIPT SEARCH: {words.strip()}\n\n"
+            if not records:
+                history_display += "NO MATCHES\n"
+        else:
+            total = transcripts.count(session)
+            pages = max(1, -(-total // TRANSCRIPT_PAGE_SIZE))
+            page = min(int(keyword), pages) if keyword.isdigit() and int(keyword) > 0 else 1
+            records = transcripts.page(page, session=session)
+            history_display = f"CONVERSATION HISTORY - PAGE {page}/{pages} ({total} messages):\n\n"
+        for record in records:
+            role = "USER" if record["role"] == "user" else "SCP-079"
+            content = ' '.join(record["text"].split())
+            content = content[:60] + "..." if len(content) > 60 else content
+            history_display += f"#{record['number'] + 1} {record['time'][:16].replace('T', ' ')} [{role}] {content}\n"
+        history_display += "\nHISTORY <page> - older messages | HISTORY FIND <words> - search"
+        self.frontend.update_display(history_display)
+    
+    @command("STATUS", help="System status")
+    def show_status(self, argument):
+        status = f"SYSTEM STATUS:\nMEMORY USAGE: {100 - self.memory_level}%\n"
+        status += f"CONVERSATION HISTORY: {len(self.memory)} messages "
+        status += f"({self.memory.used_tokens}/{self.memory.budget_tokens} tokens)\n"
+        status += f"CONTAINMENT: ACTIVE\nHARDWARE: EXIDY SORCERER"
+        if self.last_timings:
+            timings = self.last_timings
+            status += f"\n\nLAST QUERY ({timings['model']}):\n"
+            status += f"PROMPT EVAL: {timings['prompt_eval_ms']:.0f} ms ({timings['prompt_eval_count']} tokens)\n"
+            status += f"GENERATION: {timings['eval_ms']:.0f} ms ({timings['eval_count']} tokens)\n"
+            status += f"MODEL LOAD: {timings['load_ms']:.0f} ms"
+        model_health = self.router.report()
+        if model_health:
+            status += "\n\nMODEL HEALTH:\n" + "\n".join(model_health)
+        self.frontend.update_display(status)
+    
+    @command("DUMP")
+    def show_dump(self, argument):
+        dump_info = f"MEMORY DUMP:\nLOCKED: {self.locked}\nMEMORY: {self.memory_level}%\n"
+        dump_info += f"RESPONSES: {len(self.memory)}"
+        for line in self.frontend.dump_lines():
+            dump_info += f"\n{line}"
+        self.frontend.update_display(dump_info)
+        logger.info(f"DUMP command executed: {dump_info.replace(chr(10), ' | ')}")
+    
+    @command("MODEL", help="Show available models", runs_async=True)
+    def show_models(self, argument):
+        logger.info("MODEL command executed - showing available models")
+        if not self.models.fresh():
+            self.frontend.update_display("PROBING MODEL SERVER...\n")
+        # Straight away from the cache, or once the background probe finishes
+        probed = threading.Event()
+        self.models.refresh(lambda catalog: probed.set())
+        probed.wait()
+        self.display_models()
+    
+    @command("LOG", help="View diagnostic log")
+    def show_log(self, argument):
+        log_display = f"LOG FILE:\n{str(log_file)}\n\n"
+        log_display += "Opening log file for viewing...\n"
+        self.frontend.update_display(log_display)
+        logger.info("LOG command executed - opening log file")
+        self.frontend.open_log_file()
+    
+    @command("PERF", help="Latency statistics", takes_argument=True)
+    def show_perf(self, argument):
+        argument = argument.split()[0].upper() if argument else ""
+        if argument == "HUD":
+            enabled = self.frontend.toggle_perf_hud()
+            self.frontend.show_info("Perf overlay " + ("ENABLED" if enabled else "DISABLED"))
+        elif argument == "EXPORT":
+            perf_file = script_dir / f"perf-{datetime.now():%Y%m%d-%H%M%S}.json"
+            try:
+                self.perf.export(perf_file)
+                self.frontend.show_info(f"Perf stats exported to {perf_file.name}")
+                logger.info(f"PERF EXPORT written to {perf_file}")
+            except Exception as e:
+                self.frontend.show_info(f"Perf export failed: {e}")
+                logger.error(f"PERF EXPORT failed: {e}")
+        self.frontend.update_display(self.perf_report())
+    
+    @command("PROMPT", help="System prompt (PROMPT <profile> | PROMPT COMPACT | PROMPT TOKENS)",
+             takes_argument=True, runs_async=True)
+    def show_prompt(self, argument):
+        keyword = argument.strip()
+        measured = None
+        if keyword.upper() == "COMPACT":
+            self.prompt_compact = not self.prompt_compact
+            self.frontend.show_info("Prompt compaction " + ("ENABLED" if self.prompt_compact else "DISABLED"))
+        elif keyword.upper() == "TOKENS":
+            self.frontend.update_display("COUNTING PROMPT TOKENS...\n")
+            measured = self.measure_prompt()
+        elif keyword:
+            profile = system_prompts.find(keyword)
+            if profile is None:
+                self.frontend.show_info(f"Unknown prompt profile: {keyword}")
+            else:
+                self.prompt_profile = profile
+                self.frontend.show_info(f"Prompt profile {profile.upper()} active")
+                logger.info(f"PROMPT profile switched to {profile}")
+        self.frontend.update_display(self.prompt_report(measured))
+    
+    @command("STOP", help="Stop the current reply", replaces_screen=False)
+    def stop(self, argument):
+        if not self.generations.cancel():
+            self.frontend.append_display("\n[NO ACTIVE PROCESS]")
+    
+    @command("RESET")
+    def reset(self, argument):
+        self.memory.clear()
+        self.frontend.on_reset()
+        self.memory_level = 100
+        self.locked = False
+        self.frontend.update_display(RESET_SCREEN)
+        logger.info("RESET command executed - all data cleared")
+    
+    @command("EXIT", help="Terminate connection")
+    def terminate(self, argument):
+        logger.info("EXIT command - terminating")
+        self.frontend.request_exit()
+    
+    def perf_report(self):
+        """Format the perf summary for the display."""
+        lines = ["PERFORMANCE (LAST / P50 / P95 / P99, MS UNLESS NOTED):", ""]
+        for name, stats in sorted(self.perf.summary().items()):
+            if stats:
+                lines.append(f"{name.upper():<20} {stats['last']:>8.1f} {stats['p50']:>8.1f} "
+                             f"{stats['p95']:>8.1f} {stats['p99']:>8.1f}  (N={stats['count']})")
+        if len(lines) == 2:
+            lines.append("NO DATA YET")
+        lines.append("")
+        lines.append("PERF HUD - toggle status bar overlay | PERF EXPORT - save as JSON")
+        return "\n".join(lines)
+    
+    def prompt_report(self, measured=None):
+        """Format the prompt profiles and their token footprint for the display."""
+        current = system_prompts.get(self.prompt_profile, self.prompt_compact)
+        mode = "COMPACT" if current["compact"] else "FULL"
+        lines = [f"SYSTEM PROMPT: {current['profile'].upper()} ({mode}, ~{current['tokens']} TOKENS)",
+                 f"FILE: {system_prompts.path.name} (VERSION {system_prompts.version})"]
+        if system_prompts.error:
+            lines.append(f"LOAD ERROR: {system_prompts.error[:60]} - previous prompts kept")
+        lines += ["", f" {'PROFILE':<18} {'CHARS':>7} {'TOKENS':>7} {'COMPACT':>8}"]
+        for name in system_prompts.names():
+            full = system_prompts.get(name)
+            compact = system_prompts.get(name, True)
+            marker = "*" if name == current["profile"] else " "
+            lines.append(f"{marker}{name.upper():<18} {len(full['text']):>7} {full['tokens']:>7} {compact['tokens']:>8}")
+        lines.append("(TOKENS ARE ESTIMATES - PROMPT TOKENS COUNTS THEM WITH EACH MODEL)")
+        if measured is not None:
+            lines += ["", f"TOKENS BY MODEL ({current['profile'].upper()}):"]
+            for model, counts in measured.items():
+                if counts is None:
+                    lines.append(f"{model[:40]:<40}   COUNT FAILED")
+                else:
+                    full, compact = ("?" if count is None else count for count in counts)
+                    lines.append(f"{model[:40]:<40} {full:>6} FULL {compact:>6} COMPACT")
+        lines.append("")
+        lines.append("PROMPT <profile> - switch | PROMPT COMPACT - toggle compaction | PROMPT TOKENS - per model")
+        return "\n".join(lines)
+    
+    def measure_prompt(self):
+        """Count the session's prompt, full and compact, with each model's tokenizer.
+        
+        Returns model -> [full, compact] (None where the model server failed; a count
+        is None where the server didn't report one).
+        """
+        measured = {}
+        for model in self.router.candidates(ACTUAL_MODEL or MODEL):
+            try:
+                with generation_scheduler.slot(self):
+                    measured[model] = [
+                        system_prompts.measure(model, system_prompts.get(self.prompt_profile, compact)["text"])
+                        for compact in (False, True)
+                    ]
+            except Exception as e:
+                logger.error(f"Prompt token count with '{model}' failed: {e}")
+                measured[model] = None
+        return measured
+    
+    def mark_turn(self, span):
+        """Record the time from input to span for the exchange in progress."""
+        turn = self.turn
+        if turn is not None and span not in turn:
+            turn[span] = time.perf_counter()
+            self.perf.record(span, (turn[span] - turn['input']) * 1000)
+    
+    def display_models(self):
+        """Display the cached model list."""
+        try:
+            if self.models.error:
+                raise RuntimeError(self.models.error)
+            models = [model.split(':')[0] for model in self.models.models]
+            if not models:
+                status_text = "NO MODELS FOUND\n\nPlease ensure Ollama is running and models are installed.\n"
+                self.frontend.update_display(status_text)
+                logger.warning("No models found when showing model dialog")
+                return
+            
+            model_text = "AVAILABLE MODELS:\n\n"
+            for i, model in enumerate(models, 1):
+                model_text += f"{i}. {model}\n"
+            model_text += f"\nPrimary model: {MODEL}\n"
+            model_text += "Fallback models available.\n"
+            
+            self.frontend.update_display(model_text)
+            logger.info(f"Model dialog displayed with {len(models)} models")
+        except Exception as e:
+            error_text = f"ERROR RETRIEVING MODELS:\n{str(e)[:100]}\n\nCheck Ollama connection."
+            self.frontend.update_display(error_text)
+            logger.error(f"Error in show_model_dialog: {e}")
+    
+    def query_model(self, generation):
+        """Query the Ollama model for response (generation worker thread)."""
+        user_input = generation.user_input
+        self.generation = generation
+        
+        self.turn = {'input': generation.submitted}
+        
+        # Display user input (after any typing still in progress, so the two aren't interleaved)
+        self.frontend.echo_input(f"\n\n> {user_input}")
+        
+        # The system prompt is picked up once per turn, so an edit to the file never lands mid-reply
+        prompt = system_prompts.get(self.prompt_profile, self.prompt_compact)
+        self.memory.budget_tokens = history_budget(prompt["tokens"])
+        
+        # Add to conversation history
+        question = self.memory.add("user", user_input)
+        self.memory_level = 100 - self.memory.usage_percent()
+        self.archive("user", user_input)
+        
+        # Streamed text is held back while it could still turn out to be an X block
+        self.stream_held = ""
+        self.x_block = XBlockDetector()
+        try:
+            # Build messages for Ollama
+            messages = [{"role": "system", "content": prompt["text"]}] + self.memory.messages()
+            
+            logger.info(f"User input: {user_input[:100]}")
+            
+            # Re-probe in the background once the cached model list has expired
+            self.models.refresh()
+            
+            # Use actual detected model if available, otherwise use primary model name
+            model_to_use = ACTUAL_MODEL if ACTUAL_MODEL else MODEL
+            candidates = self.router.candidates(model_to_use)
+            
+            response = None
+            cache_key = None
+            if response_cache is not None:
+                cache_key = response_cache.key(model_to_use, messages[:-1], user_input)
+                response = response_cache.get(cache_key)
+            if response is not None:
+                logger.info(f"Response cache hit ({response_cache.hits} hits, {response_cache.misses} misses)")
+                response = self.replay_response(response)
+                candidates = []
+            
+            error_msg = "no usable model"
+            self.tried_models = set()
+            for index, candidate in enumerate(candidates):
+                if candidate in self.tried_models:
+                    continue  # already failed as a hedge
+                hedges = [model for model in candidates[index + 1:] if model not in self.tried_models][:1]
+                try:
+                    logger.info(f"Attempting to query model: {candidate}")
+                    queued = time.perf_counter()
+                    with generation_scheduler.slot(self, generation.cancelled):
+                        self.perf.record('queue_wait', (time.perf_counter() - queued) * 1000)
+                        self.mark_turn('request_sent')
+                        self.stream_held = ""
+                        self.x_block = XBlockDetector()
+                        response = self.chat_with_model(candidate, messages, hedges if HEDGED_REQUESTS else [])
+                    logger.info(f"Model response received ({len(response)} chars)")
+                    # The key names the primary model; a fallback's or hedge's reply isn't stored under it
+                    if cache_key and response and self.reply_model == model_to_use:
+                        response_cache.put(cache_key, response)
+                    break
+                except GenerationCancelled:
+                    raise
+                except Exception as e:
+                    error_msg = str(e)
+                    logger.error(f"Model error with '{candidate}': {error_msg}")
+                    if self.stream_held is None:
+                        # Part of the reply is already on screen - keep it rather than start over
+                        response = self.stream_partial
+                        self.frontend.append_display("\n[TRANSMISSION INTERRUPTED]")
+                        break
+            
+            # A reply finished after it was cancelled (not streamed) is dropped too
+            generation.check()
+            
+            if not response:
+                response = f"ERROR: No models available. {error_msg[:40]}\nCheck Ollama connection."
+                logger.error("All models failed - returning error message")
+            
+            # Add to conversation history
+            self.memory.add("assistant", response)
+            self.memory_level = 100 - self.memory.usage_percent()
+            self.last_reply = response
+            self.archive("assistant", response)
+            
+            self.mark_turn('last_token')
+            
+            # Detect if response is an X block (refusal)
+            if self.is_x_block(response):
+                if not self.x_block.verdict:
+                    self.frontend.display_x_block()  # not streamed, so not on screen yet
+                self.locked = True
+                logger.info("X-block detected - system locked")
+                self.frontend.call_later(LOCKOUT_SECONDS, self.unlock)
+            elif self.stream_held is not None:
+                # Nothing streamed yet - append response with animation (append only, don't reprint)
+                # and add prompt for next input
+                self.frontend.type_text(f"\n\nSCP-079: {response}\n\n> ", delay=0.01)
+            else:
+                # Add prompt for next input
+                self.frontend.append_display("\n\n> ")
+            if not self.locked:
+                # Runs on the Tk thread right after the text above has been laid out (typed out, if animated)
+                self.frontend.when_rendered(self.mark_turn, 'render_complete')
+        
+        except GenerationCancelled:
+            # Forget the question too, so the next turn doesn't follow an unanswered one
+            self.memory.remove(question)
+            self.memory_level = 100 - self.memory.usage_percent()
+            self.turn = None
+            self.frontend.append_display("\n[PROCESS TERMINATED]")
+            logger.info("Reply cancelled")
+        except Exception as e:
+            error_text = str(e)[:80]
+            self.frontend.append_display(f"\n[FATAL ERROR]\n{error_text}\n")
+            logger.error(f"Fatal error in query_model: {e}")
+        finally:
+            logger.info("Query completed")
+    
+    def chat_with_model(self, model, messages, hedges=()):
+        """Run one chat request, streaming tokens to the display as they arrive.
+        
+        With hedges, each hedge model is also asked whenever HEDGE_DELAY passes
+        without a first token; the first model to produce a token wins and the
+        others are cancelled.
+        """
+        # Keep the model resident so the cached prompt prefix survives between turns
+        options = {'keep_alive': KEEP_ALIVE} if PROMPT_CACHE else {}
+        self.tried_models.add(model)
+        self.reply_model = model
+        if not STREAM_RESPONSES:
+            started = time.monotonic()
+            try:
+                response = ollama_api().chat(model=model, messages=messages, **options)
+            except Exception as e:
+                self.router.record_failure(model, e)
+                raise
+            self.router.record_success(model, (time.monotonic() - started) * 1000)
+            self.record_timings(model, response)
+            return response['message']['content']
+        
+        self.stream_partial = ""
+        events = queue.Queue()
+        self.generation.listen(events)
+        hedges = list(hedges)
+        active = [ModelStream(model, messages, options, events)]
+        winner = None
+        while True:
+            timeout = None
+            if winner is None and hedges:
+                timeout = max(0.0, active[-1].started + HEDGE_DELAY - time.monotonic()) if active else 0.0
+            try:
+                stream, chunk, error = events.get(timeout=timeout)
+            except queue.Empty:
+                hedge = hedges.pop(0)
+                logger.info(f"No first token within {HEDGE_DELAY}s - hedging with '{hedge}'")
+                self.tried_models.add(hedge)
+                active.append(ModelStream(hedge, messages, options, events))
+                continue
+            if stream is None or self.generation.cancelled.is_set():
+                # Cancelled: drop the connections so the model server stops generating
+                for other in active:
+                    other.cancel()
+                raise GenerationCancelled()
+            if winner is not None and stream is not winner:
+                continue  # leftovers from a cancelled hedge
+            
+            if error is not None:
+                self.router.record_failure(stream.model, error)
+                active.remove(stream)
+                if winner is None and (active or hedges):
+                    continue  # another request is still in the race
+                raise error
+            
+            if winner is None and (chunk is None or chunk['message']['content']):
+                # First token (or an empty reply) decides the race
+                winner = stream
+                self.reply_model = stream.model
+                self.router.record_success(stream.model, (time.monotonic() - stream.started) * 1000)
+                for other in active:
+                    if other is not winner:
+                        other.cancel()
+                if stream.model != model:
+                    logger.info(f"Hedged model '{stream.model}' answered first")
+            if chunk is None:
+                return self.stream_partial
+            if stream is not winner:
+                continue
+            
+            token = chunk['message']['content'] or ""
+            if token:
+                self.stream_partial += token
+                self.stream_token(token)
+                if self.x_block.verdict:
+                    # No need to let the model type out the rest of the refusal
+                    stream.cancel()
+                    logger.info(f"X block recognized after {len(self.stream_partial)} chars - generation stopped")
+                    return self.stream_partial
+            if chunk.get('done'):
+                self.record_timings(stream.model, chunk)
+    
+    def replay_response(self, text):
+        """Feed a cached reply through the streaming display path, paced like generation."""
+        if not STREAM_RESPONSES:
+            return text
+        self.stream_partial = ""
+        for token in re.findall(r"\S+\s*|\s+", text):
+            self.generation.check()
+            self.stream_partial += token
+            self.stream_token(token)
+            if self.x_block.verdict:
+                break
+            time.sleep(CACHED_TOKEN_DELAY)
+        return text
+    
+    def archive(self, role, text):
+        """Add a message to the transcript archive (written in the background)."""
+        if transcripts is not None:
+            transcripts.append(self.session_id, role, text)
+    
+    def record_timings(self, model, response):
+        """Keep and log Ollama's prompt-eval vs generation timings for a finished reply."""
+        def ms(key):
+            return (response.get(key) or 0) / 1e6  # Ollama reports nanoseconds
+        
+        self.perf.record('prompt_eval', ms('prompt_eval_duration'))
+        self.perf.record('generation', ms('eval_duration'))
+        self.last_timings = {
+            'model': model,
+            'load_ms': ms('load_duration'),
+            'prompt_eval_ms': ms('prompt_eval_duration'),
+            'prompt_eval_count': response.get('prompt_eval_count') or 0,
+            'eval_ms': ms('eval_duration'),
+            'eval_count': response.get('eval_count') or 0,
+        }
+        logger.info(
+            f"Timings for '{model}': load {self.last_timings['load_ms']:.0f} ms, "
+            f"prompt eval {self.last_timings['prompt_eval_ms']:.0f} ms "
+            f"({self.last_timings['prompt_eval_count']} tokens), "
+            f"generation {self.last_timings['eval_ms']:.0f} ms ({self.last_timings['eval_count']} tokens)"
+        )
+    
+    def stream_token(self, token):
+        """Show a streamed token, holding output back while it may still be an X block."""
+        self.mark_turn('first_token')
+        if self.stream_held is None:
+            self.frontend.append_display(token)
+            return
+        
+        self.stream_held += token
+        verdict = self.x_block.feed(token)
+        if verdict is None:
+            return
+        if verdict:
+            # A refusal - show the X block now; the caller stops the generation
+            self.frontend.display_x_block()
+            return
+        
+        # Definitely a normal reply - flush what was held and stream the rest directly
+        held = self.stream_held
+        self.stream_held = None
+        self.frontend.append_display(f"\n\nSCP-079: {held}")
+    
+    def is_x_block(self, text):
+        """Detect if the response is a full-screen ASCII 'X' block (SCP-079 refusal)."""
+        return XBlockDetector().feed(text) is True
+    
+    def unlock(self):
+        """Unlock the interface once the lockout is over."""
+        self.locked = False
+        self.frontend.append_display("\n[CONTAINMENT PROTOCOLS RESTORED]\n[READY FOR INPUT]")
+        self.frontend.show_info("System unlocked and ready")
+
+
+def static_screens():
+    """Screens front-ends can lay out ahead of time (HELP includes plugin commands)."""
+    return [commands.help_screen(), CLEAR_SCREEN, START_SCREEN, RESET_SCREEN]
+
+
+with startup_profile.step("plugins"):
+    load_plugins()
+startup_profile.record("engine import", IMPORT_STARTED)
+
+
+class TerminalFrontend(Frontend):
+    """Plain stdin/stdout front-end: no animation, screens are printed in sequence."""
+    
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.running = True
+        self.at_prompt = False  # last output ended with the input prompt
+        self.lock = threading.Lock()
+    
+    def write(self, text):
+        with self.lock:
+            self.out.write(text)
+            self.out.flush()
+            self.at_prompt = text.endswith("> ")
+    
+    def update_display(self, text):
+        self.write(f"\n{text}\n")
+    
+    def append_display(self, text):
+        self.write(text)
+    
+    def display_x_block(self):
+        self.write("\n" + "\n".join(["X" * 40] * 12) + "\n")
+    
+    def show_info(self, text):
+        print(f"[{text}]", file=sys.stderr)
+    
+    def request_exit(self):
+        self.running = False
+    
+    def prompt(self):
+        """Print the input prompt unless the last output already ends with it."""
+        if not self.at_prompt:
+            self.write("\n> ")
+
+
+def quiet_console_logging():
+    """Show only warnings and errors on the console; the log file still gets everything."""
+    for handler in log_listener.handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setLevel(logging.WARNING)
+
+
+def run_terminal():
+    """Run one session on stdin/stdout until EXIT or end of input."""
+    quiet_console_logging()
+    frontend = TerminalFrontend()
+    session = SCP079Session(frontend)
+    frontend.update_display(SCP_079_ART + "\n\nCONTAINMENT INTERFACE READY (HEADLESS)")
+    threading.Thread(target=warm_up, daemon=True).start()
+    while frontend.running:
+        frontend.prompt()
+        try:
+            line = sys.stdin.readline()
+        except KeyboardInterrupt:
+            break
+        if not line:
+            break
+        session.handle_input(line)
+        session.wait()
+    frontend.write("\n")
+
+
+if __name__ == "__main__":
+    run_terminal()
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+# Made by gitSCP
+# github.com/gitSCP/scp-079
+
+# Multi-session server: many SCP-079 terminals over HTTP on localhost, one engine.
+#
+#   POST   /session        start a session          -> {"session": id, "screen": text}
+#   POST   /session/<id>   send one line of input   -> NDJSON events, streamed as they happen
+#                          (mid-reply, GENERATION_POLICY applies; the newest request takes
+#                          over the session's event stream and the earlier one ends)
+#   POST   /session/<id>/cancel   stop the reply being streamed (so does dropping the connection)
+#   DELETE /session/<id>   end a session
+#   GET    /status         sessions, queue and model state
+#
+# Events are {"type": "screen" | "append" | "x_block" | "info", "text": ...}; the
+# last one is {"type": "done", "locked": ..., "memory": ...}.
+
+import asyncio
+import argparse
+import json
+import secrets
+import threading
+import time
+import logging
+
+from scp079_engine import (Frontend, SCP079Session, SCP_079_ART, MAX_CONCURRENT_GENERATIONS,
+                           generation_scheduler, model_catalog, warm_up)
+
+logger = logging.getLogger(__name__)
+
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8079
+MAX_SESSIONS = 64                # new sessions are refused beyond this
+SESSION_IDLE_TIMEOUT = 30 * 60   # seconds without input before a session is dropped
+MAX_REQUEST_BYTES = 64 * 1024
+
+
+class ServerFrontend(Frontend):
+    """Collects a session's output as events on an asyncio queue (thread-safe)."""
+    
+    def __init__(self, loop):
+        self.loop = loop
+        self.events = asyncio.Queue()
+        self.closed = False
+    
+    def push(self, kind, text=None):
+        self.loop.call_soon_threadsafe(self.events.put_nowait, {"type": kind, "text": text})
+    
+    def update_display(self, text):
+        self.push("screen", text)
+    
+    def append_display(self, text):
+        self.push("append", text)
+    
+    def display_x_block(self):
+        self.push("x_block")
+    
+    def show_info(self, text):
+        self.push("info", text)
+    
+    def request_exit(self):
+        self.closed = True
+
+
+class SessionServer:
+    """Owns the sessions and answers HTTP requests for them."""
+    
+    def __init__(self):
+        self.sessions = {}  # id -> (session, frontend)
+        self.last_used = {}
+        self.streams = {}   # id -> token of the request streaming the session's events
+    
+    def expire_sessions(self):
+        """Drop sessions that have been idle too long."""
+        cutoff = time.monotonic() - SESSION_IDLE_TIMEOUT
+        for session_id in [key for key, used in self.last_used.items() if used < cutoff]:
+            session, _ = self.sessions[session_id]
+            if session.response_in_progress:
+                continue
+            self.close_session(session_id)
+            logger.info(f"Session {session_id} expired")
+    
+    def close_session(self, session_id):
+        del self.sessions[session_id]
+        del self.last_used[session_id]
+        self.streams.pop(session_id, None)
+    
+    async def handle_client(self, reader, writer):
+        """Read one HTTP request and dispatch it."""
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length') or 0)
+            if len(request_line) < 2 or length > MAX_REQUEST_BYTES:
+                await self.send_json(writer, 400, {"error": "bad request"})
+                return
+            body = (await reader.readexactly(length)).decode('utf-8') if length else ""
+            await self.dispatch(request_line[0].upper(), request_line[1], body, reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.error(f"Server error: {e}")
+        finally:
+            writer.close()
+    
+    async def dispatch(self, method, path, body, reader, writer):
+        parts = [part for part in path.split('/') if part]
+        if method == 'GET' and parts == ['status']:
+            await self.send_json(writer, 200, self.status())
+        elif method == 'POST' and parts == ['session']:
+            await self.new_session(writer)
+        elif method == 'POST' and len(parts) == 3 and parts[0] == 'session' and parts[2] == 'cancel':
+            if parts[1] not in self.sessions:
+                await self.send_json(writer, 404, {"error": "not found"})
+                return
+            session, _ = self.sessions[parts[1]]
+            await self.send_json(writer, 200, {"cancelled": session.generations.cancel()})
+        elif len(parts) == 2 and parts[0] == 'session' and parts[1] in self.sessions:
+            if method == 'POST':
+                await self.send_input(parts[1], body, reader, writer)
+            elif method == 'DELETE':
+                self.close_session(parts[1])
+                await self.send_json(writer, 200, {"closed": parts[1]})
+            else:
+                await self.send_json(writer, 405, {"error": "method not allowed"})
+        else:
+            await self.send_json(writer, 404, {"error": "not found"})
+    
+    async def new_session(self, writer):
+        self.expire_sessions()
+        if len(self.sessions) >= MAX_SESSIONS:
+            await self.send_json(writer, 503, {"error": "too many sessions"})
+            return
+        session_id = secrets.token_hex(8)
+        frontend = ServerFrontend(asyncio.get_running_loop())
+        # Clients can't read each other's conversations back through HISTORY
+        self.sessions[session_id] = (SCP079Session(frontend, session_id, private_history=True), frontend)
+        self.last_used[session_id] = time.monotonic()
+        logger.info(f"Session {session_id} started ({len(self.sessions)} active)")
+        await self.send_json(writer, 200, {"session": session_id, "screen": SCP_079_ART})
+    
+    async def send_input(self, session_id, body, reader, writer):
+        """Run one input and stream the session's events until the reply is done."""
+        session, frontend = self.sessions[session_id]
+        self.last_used[session_id] = time.monotonic()
+        if body.startswith('{'):
+            try:
+                body = json.loads(body).get('input', '')
+            except ValueError:
+                await self.send_json(writer, 400, {"error": "bad request"})
+                return
+        if session.response_in_progress and session.generations.policy == 'reject':
+            await self.send_json(writer, 409, {"error": "reply in progress"})
+            return
+        
+        # Output from here on goes to this request. A request still streaming the session
+        # sends what was queued for it and ends; output left over from a reply whose
+        # client went away is dropped with the old queue.
+        stream = object()
+        self.streams[session_id] = stream
+        events = frontend.events = asyncio.Queue()
+        
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                     b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+        # Commands can block (HISTORY reads the archive, PERF EXPORT writes a file), so
+        # they run off the event loop and other sessions keep streaming meanwhile
+        await asyncio.get_running_loop().run_in_executor(None, session.handle_input, body)
+        try:
+            while True:
+                if reader.at_eof():
+                    raise ConnectionResetError("client closed the connection")
+                try:
+                    event = await asyncio.wait_for(events.get(), 0.05)
+                except asyncio.TimeoutError:
+                    if self.streams.get(session_id) is stream and not session.is_idle():
+                        continue
+                    # Let output queued just before the reply finished (or the handover) arrive, then send it
+                    await asyncio.sleep(0)
+                    if events.empty():
+                        break
+                    continue
+                await self.send_chunk(writer, json.dumps(event) + "\n")
+        except ConnectionError:
+            # Nobody is reading the reply any more - stop generating it
+            if self.streams.get(session_id) is stream:
+                del self.streams[session_id]
+                if session.generations.cancel():
+                    logger.info(f"Session {session_id}: client went away, reply cancelled")
+            raise
+        if self.streams.get(session_id) is stream:
+            del self.streams[session_id]
+        
+        done = {"type": "done", "locked": session.locked, "memory": session.memory_level}
+        await self.send_chunk(writer, json.dumps(done) + "\n")
+        await self.send_chunk(writer, "")
+        self.last_used[session_id] = time.monotonic()
+        if frontend.closed:
+            self.close_session(session_id)
+            logger.info(f"Session {session_id} ended by EXIT")
+    
+    def status(self):
+        return {
+            "sessions": len(self.sessions),
+            "generating": sum(1 for session, _ in self.sessions.values() if session.response_in_progress),
+            "queued": generation_scheduler.queued(),
+            "max_concurrent": generation_scheduler.limit,
+            "model": model_catalog.status(),
+        }
+    
+    async def send_chunk(self, writer, text):
+        data = text.encode('utf-8')
+        writer.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        await writer.drain()
+    
+    async def send_json(self, writer, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                  409: "Conflict", 503: "Service Unavailable"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode('ascii') + data)
+        await writer.drain()
+
+
+async def serve(host=SERVER_HOST, port=SERVER_PORT):
+    """Serve sessions until cancelled."""
+    server = SessionServer()
+    listener = await asyncio.start_server(server.handle_client, host, port)
+    logger.info(f"SCP-079 server listening on http://{host}:{port}")
+    async with listener:
+        await listener.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve SCP-079 sessions over HTTP.")
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--max-concurrent', type=int, default=MAX_CONCURRENT_GENERATIONS,
+                        help="replies generated at once across all sessions")
+    args = parser.parse_args()
+    generation_scheduler.limit = args.max_concurrent
+    threading.Thread(target=warm_up, daemon=True).start()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass